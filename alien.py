@@ -1,44 +1,57 @@
 import pygame
 from pygame.sprite import Sprite
-from settings import Settings
 
-settings = Settings()
-DEFAULT_IMAGE_SIZE = (settings.screen_width * .08, settings.screen_height * .18)
+from pixels import round_pixel
+
+ALIEN_IMAGE = 'images/alien.bmp'
+
+def image_size(settings):
+    '''
+    The size aliens are drawn at, a fixed share of the screen
+    '''
+    # whole pixels, the same size the asset cache scales the image to
+    return int(settings.screen_width * .08), int(settings.screen_height * .18)
 
 class Alien(Sprite):
     '''
-    A class that represents a single alien in the fleet
+    A class that represents a single alien in the fleet. Its position lives in the fleet's arrays,
+    the sprite is only a handle so drawing and collision code can treat aliens like any other sprite
     '''
-    def __init__(self, ai_game):
+    def __init__(self, fleet, index):
         '''
-        Initialize the alien and srt it's starting position
+        Initialize the alien as entry index of the fleet
         '''
         super().__init__()
-        self.screen = ai_game.screen
-        self.settings = ai_game.settings
+        self.fleet = fleet
+        self.index = index
 
-        # Load the alien image, scale it, and set its rect attribute
-        self.image = pygame.transform.scale(pygame.image.load('images/alien.bmp'), DEFAULT_IMAGE_SIZE)
-        
-        self.rect = self.image.get_rect()
+        # every alien shares the fleet's scaled alien image
+        self.image = fleet.image
 
-        # Start each new alien near the top left of the screen
-        self.rect.x = self.rect.width
-        self.rect.y = self.rect.height
+    @property
+    def x(self):
+        '''
+        The alien's exact horizontal position
+        '''
+        return self.fleet.x[self.index]
 
-        #Store the alien's exact horizontal position
-        self.x = float(self.rect.x)
+    @property
+    def y(self):
+        '''
+        The alien's exact vertical position
+        '''
+        return self.fleet.y[self.index]
 
-    def check_edges(self):
+    @property
+    def mask(self):
         '''
-        Return True if alien is at the edge of the screen
+        The alien's pixel collision mask, shared by the whole fleet
         '''
-        screen_rect = self.screen.get_rect()
-        return (self.rect.right >= screen_rect.right) or (self.rect.left <= 0)
-    
-    def update(self):
+        return self.fleet.mask
+
+    @property
+    def rect(self):
         '''
-        Move the alien to the right
+        A rect at the alien's current position. Moving the alien is the fleet's job, so this is a fresh copy
         '''
-        self.x += self.settings.alien_speed * self.settings.fleet_direction
-        self.rect.x = self.x
\ No newline at end of file
+        return pygame.Rect(round_pixel(self.x), round_pixel(self.y), self.fleet.width, self.fleet.height)
@@ -1,5 +1,9 @@
+import os
 import sys
-from time import sleep
+from time import perf_counter
+
+# when this module started loading, so the startup report can include importing pygame and the game modules
+_import_start = perf_counter()
 
 import pygame
 
@@ -8,124 +12,196 @@ from ship import Ship, ShipLivesGreen, ShipLivesRed
 from game_stats import GameStats
 from scoreboard import Scoreboard
 from button import Button
-from laser import Laser
-from alien import Alien
+from laser import Lasers
+from fleet import Fleet
+from formations import fleet_layout
+from asset_cache import AssetCache
+from game_state import GameState, MENU, PLAYING, RESPAWNING, GAME_OVER
+from renderer import Renderer
+from text import FontRegistry
+from high_scores import HighScoreStore
+from controls import Controls, ALLOWED_EVENTS
+from snapshot import save_snapshot, load_snapshot
+from timing import FixedStepTimer
+from profiler import FrameProfiler, NullProfiler, EVENTS, SHIP, LASERS, COLLISIONS, ALIENS, WAIT
+
+IMPORT_TIME = perf_counter() - _import_start
 
 class AlienInvasion:
     '''
     Overall class to manage game assets and behavior
     '''
 
-    def __init__(self):
+    def __init__(self, headless=False, settings=None):
         '''
-        Initialize the game, and create game resources
+        Initialize the game, and create game resources. A headless game opens no window, draws off screen and keeps simulated time
         '''
-        pygame.init()
+        self.headless = headless
+        if headless:
+            # SDL's dummy driver gives us a real display surface without opening a window
+            os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        # seconds each part of startup took, in order, see startup_report()
+        self.startup_times = []
+        self._startup_mark = perf_counter()
+
+        # only the parts of pygame the game uses, pygame.init() would also start audio, joysticks and so on
+        pygame.display.init()
+        pygame.font.init()
+        self._startup_step('pygame')
 
         # using Clock for frame rate control
         self.clock = pygame.time.Clock()
+        # frames simulated so far and simulated seconds elapsed, used instead of the wall clock when headless
+        self.frame = 0
+        self.sim_time = 0.0
+        # optional InputRecorder that logs every event we handle, for replaying the session later
+        self.recorder = None
+        # the main loop runs until quit() is called, so quitting doesn't take the whole process down with it
+        self.running = True
+
+        # the one Settings every part of the game shares
+        self.settings = settings or Settings()
+        # per-phase frame timings, a do-nothing stand-in unless profiling is switched on
+        if self.settings.profile:
+            self.profiler = FrameProfiler(self, overlay=self.settings.profile_overlay)
+        else:
+            self.profiler = NullProfiler()
 
-        self.settings = Settings()
+        # splits real frame time into fixed physics steps, whatever the frame rate is
+        self.timer = FixedStepTimer(1 / self.settings.physics_hz)
 
-        self.screen = pygame.display.set_mode(( self.settings.screen_width, self.settings.screen_height))
+        screen_size = (self.settings.screen_width, self.settings.screen_height)
+        # where everything is placed, whether or not anything is ever drawn
+        self.screen_rect = pygame.Rect((0, 0), screen_size)
+        if headless:
+            # a headless game draws into its own surface, so several can run side by side in one process.
+            # The surface is only made when something first draws, games that never do (e.g. on a server) go without.
+            # A display mode is still needed once for images to be converted to its pixel format
+            if pygame.display.get_surface() is None:
+                pygame.display.set_mode(screen_size)
+            self._screen = None
+        else:
+            self._screen = pygame.display.set_mode(screen_size)
         pygame.display.set_caption("Alien Invasion")
+        # keep everything the game ignores out of the event queue, so there's less to get through each frame
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(ALLOWED_EVENTS)
+        self._startup_step('display')
+        # Images are decoded, scaled and converted once here and shared by every sprite that uses them
+        self.assets = AssetCache()
+        # everything the menu and the first fleet need comes out of the prebuilt atlas in one read, if there is one
+        self.assets.load_atlas(self.settings.atlas_path)
+        # everything on screen is drawn through the renderer, which only repaints what changed
+        self.renderer = Renderer(self)
+        # fonts are shared by the scoreboard and the buttons
+        self.fonts = FontRegistry()
+        self._startup_step('renderer')
+        # the high score survives between launches, except for headless games which shouldn't touch the player's
+        self.high_scores = HighScoreStore(None if headless else self.settings.high_score_path)
         # An instance of GameStats to store game statistics. A good example showing that an instance of a class represents state an object
         self.stats = GameStats(self)
         #An instance of Scoreboard to create a score board and store game stats
         self.sb = Scoreboard(self)
+        self._startup_step('scoreboard')
         self.ship = Ship(self) #self gives Ship access to AlienInvasion resources via AlienInvasion instance
-        self.lasers = pygame.sprite.Group()
-        self.aliens = pygame.sprite.Group()
-
-        self._create_fleet()
+        self.lasers = Lasers(self)
+        # keyboard bindings, movement and auto-fire
+        self.controls = Controls(self)
+        # the fleet stays empty until Play is clicked, there's nothing to build it for at the menu
+        self.aliens = Fleet(self)
+        self._startup_step('sprites')
 
         # setting the background color
         self.bg_color = (230, 230, 230)
 
-        # start game in an inactive state
-        self.game_active = False
+        # start game in an inactive state, at the menu
+        self.state = GameState(MENU)
 
         # make the play button
         self.play_button = Button(self, "Play")
+        # nothing moves outside of play, so the whole scene is drawn into one surface once per state and reused,
+        # along with the state change it was drawn for
+        self.still_scene = None
+        self.still_scene_changes = None
+        self._startup_step('menu')
 
-    def _create_alien(self, x_position, y_position):
+    def _startup_step(self, name):
         '''
-        Create an alien and place it in a row
+        Record how long the startup step name took, since the last one finished
         '''
-        new_alien = Alien(self)
-        new_alien.x = x_position
-        new_alien.rect.x = x_position
-        new_alien.rect.y = y_position
-        self.aliens.add(new_alien)
-    
+        now = perf_counter()
+        self.startup_times.append((name, now - self._startup_mark))
+        self._startup_mark = now
+
+    def startup_report(self):
+        '''
+        Return a table of how long each part of startup took, in milliseconds, importing the game included
+        '''
+        steps = [('imports', IMPORT_TIME)] + self.startup_times
+        lines = [f"{name:<12}{seconds * 1000:8.1f}ms" for name, seconds in steps]
+        lines.append(f"{'total':<12}{sum(seconds for _, seconds in steps) * 1000:8.1f}ms")
+        return '\n'.join(lines)
+
     def _create_fleet(self):
         '''
         Create the fleet of aliens
         '''
-        # Make one alien, and add until there is no room
-        # Spacing between aliens is one alien width and one alien height
-        alien = Alien(self)
-        alien_width, alien_height = alien.rect.size
-
-        current_x, current_y = alien_width, alien_height
-        while current_y < (self.settings.screen_height - 3 * alien_height):
-            while current_x < (self.settings.screen_width - 2 * alien_width):
-                self._create_alien(current_x, current_y)
-                current_x += 2 * alien_width
-
-            # Finished a row - reset x value, and increment y value
-            current_x = alien_width
-            current_y += 2 * alien_height
+        # the formation is only worked out the first time for this screen and alien size, after that it's cached
+        positions = fleet_layout(self.settings.fleet_formation, self.settings.screen_width,
+            self.settings.screen_height, self.aliens.width, self.aliens.height)
+        # move surviving aliens back into formation and bring back the rest, rather than building a new fleet
+        self.aliens.reset(positions)
     
     def _change_fleet_direction(self):
         '''
         Drop down the entire fleet  and change direction of movement
         '''
-        for alien in self.aliens.sprites():
-            alien.rect.y += self.settings.fleet_drop_speed
+        self.aliens.drop()
         self.settings.fleet_direction *= -1
     
     def _check_fleet_edges(self):
         '''
         Respond appropriately if any aliens have reached the edge the screen/play area
         '''
-        for alien in self.aliens.sprites():
-            if alien.check_edges():
-                self._change_fleet_direction()
-                break
+        if self.aliens.check_edges():
+            self._change_fleet_direction()
 
     def _fire_laser(self):
         '''
-        Create a new laser and add it to the lasers group
+        Fire a new laser, if there are fewer than the maximum in flight
         '''
         if len(self.lasers) < self.settings.laser_max_num:
-            new_laser = Laser(self)
-            self.lasers.add(new_laser)
+            self.lasers.fire()
+
+    def _apply_action(self, move, fire):
+        '''
+        Steer the ship without the keyboard: move is -1 for left, 1 for right or 0 to stop, and fire shoots a laser
+        '''
+        self.ship.moving_left = move < 0
+        self.ship.moving_right = move > 0
+        if fire:
+            self._fire_laser()
 
-    def _update_laser(self):
+    def _update_laser(self, dt):
         '''
-        Update position of lasers and get rid of old ones
+        Update position of lasers over dt seconds and get rid of old ones
         '''
-        self.lasers.update()
-         # get rid of lasers that passed the screen for memory management
-        for laser in self.lasers.copy():
-            if laser.rect.bottom <= 0:
-                self.lasers.remove(laser)
+        # lasers that passed the screen are dropped in the same step that moves them
+        self.lasers.update(dt)
+        self.profiler.mark(LASERS)
         self._check_laser_alien_collisions()
         
     def _check_laser_alien_collisions(self):
         '''
         Respond to laser-alien collisions. Remove any lasers & aliens that have collided
         '''    
-        collisions = pygame.sprite.groupcollide(
-            self.lasers, self.aliens, True, True
-        )
+        collisions = self.aliens.collide_lasers(self.lasers, True, True)
 
         if collisions:
             for aliens in collisions.values():
                 self.stats.score += self.settings.alien_points * len(aliens)
-                self.sb.prep_score()
-                self.sb.check_high_score()
+            # the scoreboard hears about the new score from stats, and redraws it at most once per frame
+            self.sb.check_high_score()
 
         if not self.aliens:
             # destroy existing lasers and make new fleet
@@ -135,147 +211,258 @@ class AlienInvasion:
 
             #increase level
             self.stats.level +=1
-            self.sb.prep_level()
     
     def _ship_hits(self):
         '''
         Respond to the ship being his by an alien
         '''
-        # Decrement ships left on each hit, and update scoreboard
+        # Decrement ships left on each hit, the scoreboard updates itself from the stats
         self.stats.ships_left -= 1
-        self.sb.prep_ships()
         if self.stats.ships_left > 0:
-            # Get rid of any remaining lasers and aliens on hit
+            # Get rid of any remaining lasers on hit, the fleet is reset into formation below
             self.lasers.empty()
-            self.aliens.empty()
 
             # Create a new fleet and center the ship for the next round
             self._create_fleet()
             self.ship.center_ship()
             
-            # Pause for player to get ready for next round
-            sleep(0.5)
+            # Pause for player to get ready for next round. The game stops moving, but events and drawing carry on
+            self.state.change(RESPAWNING, self.settings.respawn_time, then=PLAYING)
         
         else:
-            self.game_active = False
+            self.state.change(GAME_OVER, self.settings.game_over_time, then=MENU)
             pygame.mouse.set_visible(True)
 
+    @property
+    def game_active(self):
+        '''
+        True while a game is in progress, including the pause after a hit
+        '''
+        return self.state.current in (PLAYING, RESPAWNING)
+
     def _check_for_aliens_at_bottom(self):
         '''
         Check if any aliens have reached the bottom of the screen
         '''
-        for alien in self.aliens.sprites():
-            if alien.rect.bottom >= self.settings.screen_height:
-                # treat this the same way as if the ship was hit by an alien - a losing condition
-                self._ship_hits()
-                break
+        if self.aliens.reached_bottom():
+            # treat this the same way as if the ship was hit by an alien - a losing condition
+            self._ship_hits()
     
-    def _update_aliens(self):
+    def _update_aliens(self, dt):
         '''
-        Check if fleet is at the edge, update the positions of all aliens in the fleet.
+        Check if fleet is at the edge, update the positions of all aliens in the fleet over dt seconds.
         '''
         self._check_fleet_edges()
-        self.aliens.update()
+        self.aliens.update(dt)
 
         # check for alien-ship collisions
-        if pygame.sprite.spritecollideany(self.ship, self.aliens):
+        if self.aliens.spritecollideany(self.ship):
             self._ship_hits()
 
         # check for aliens hitting the bottom of screen
         self._check_for_aliens_at_bottom()
     
-    def _check_keydown_event(self, event):
+    @property
+    def screen(self):
         '''
-        Respond to key presses
+        The surface the game is drawn on: the window, or for a headless game its own surface, made on first use
         '''
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_RIGHT:
-                self.ship.moving_right = True
-            elif event.key == pygame.K_LEFT:
-                self.ship.moving_left = True
-            elif event.key == pygame.K_q:
-                sys.exit()
-            elif event.key == pygame.K_SPACE:
-                self._fire_laser()
-
-    def _check_keyup_event(self, event):
-        '''
-        Respond to key releases
-        '''
-        if event.type == pygame.KEYUP:
-            if event.key == pygame.K_RIGHT:
-                self.ship.moving_right = False
-            elif event.key == pygame.K_LEFT:
-                self.ship.moving_left = False
+        if self._screen is None:
+            self._screen = pygame.Surface(self.screen_rect.size).convert()
+        return self._screen
 
     def _check_play_button(self, mouse_position):
         '''
         Start a new game when the player clicks 'Play'. Prevent game from resetting if button area is clicked when the button is not visible
         '''
         button_clicked = self.play_button.rect.collidepoint(mouse_position)
-        if button_clicked and not self.game_active:
-            #reset game stats whenever Play is clicked
-            self.settings.initialize_dynamic_settings()
-            self.stats.reset_stats()
-            self.sb.prep_score()
-            self.sb.prep_level()
-            self.sb.prep_ships()
-            self.lasers.empty()
-            self.aliens.empty()
-            self._create_fleet()
-            self.ship.center_ship()
-            self.game_active = True
-            #hide mouse cursor while playing
-            pygame.mouse.set_visible(False)
+        # the button is only there at the menu, not during the pause after the last ship is lost
+        if button_clicked and self.state.current == MENU:
+            self._start_game()
+
+    def _start_game(self):
+        '''
+        Reset the game stats, fleet and ship and start playing
+        '''
+        #reset game stats whenever Play is clicked
+        self.settings.initialize_dynamic_settings()
+        self.stats.reset_stats()
+        self.lasers.empty()
+        self._create_fleet()
+        self.ship.center_ship()
+        self.state.change(PLAYING)
+        #hide mouse cursor while playing
+        pygame.mouse.set_visible(False)
+
+    def quit(self):
+        '''
+        Stop the game. run_game() returns at the end of the frame, and a session server drops the game
+        '''
+        self.running = False
+
+    def snapshot(self):
+        '''
+        Return everything about the game in progress as bytes, see snapshot.py
+        '''
+        return save_snapshot(self)
+
+    def restore(self, snapshot):
+        '''
+        Put the game back where it was when snapshot was taken, from this game or another with the same settings
+        '''
+        load_snapshot(self, snapshot)
 
     def _check_events(self):
         # watch for keyboard and mouse events
         for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                sys.exit()
-            elif event.type == pygame.KEYDOWN:
-                self._check_keydown_event(event)
-            elif event.type == pygame.KEYUP:
-                self._check_keyup_event(event)
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_position = pygame.mouse.get_pos()
-                self._check_play_button(mouse_position)
-
-    def _update_screen(self):
-        # redraw the screeen during each pass of the loop
-        self.screen.fill(self.settings.bg_color)
-        for laser in self.lasers.sprites():
-            laser.draw_laser()
-        self.ship.blitme()
-        self.aliens.draw(self.screen)
+            self._process_event(event)
+
+    def _process_event(self, event):
+        '''
+        Log a live event if recording, and respond to it
+        '''
+        if self.recorder:
+            self.recorder.record(self.frame, event)
+        self._handle_event(event)
+
+    def _wait_for_event(self):
+        '''
+        Sleep until an event arrives or Settings.idle_timeout runs out, and respond to the event if one came
+        '''
+        event = pygame.event.wait(int(self.settings.idle_timeout * 1000))
+        if event.type != pygame.NOEVENT:
+            self._process_event(event)
+
+    def _handle_event(self, event):
+        '''
+        Respond to a single keyboard or mouse event, whether it is live or replayed
+        '''
+        if event.type == pygame.QUIT:
+            self.quit()
+        elif event.type in (pygame.KEYDOWN, pygame.KEYUP):
+            self.controls.handle_event(event)
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            # use the position stored in the event, so replayed clicks land where they were recorded
+            self._check_play_button(event.pos)
+        elif event.type == pygame.WINDOWEXPOSED:
+            # part of the window was covered, and only changed regions are normally repainted
+            self.renderer.invalidate()
+
+    def _update_screen(self, alpha=1.0):
+        # queue the frame, the renderer works out what actually changed since the last one
+        if self.state.current != PLAYING and self.state.changes == self.still_scene_changes and not self.sb.stale:
+            # paused or at the menu, and nothing changed since the scene was drawn
+            self.renderer.queue(self.still_scene, self.still_scene.get_rect())
+        else:
+            self._queue_scene(alpha)
+            if self.state.current != PLAYING:
+                self.still_scene = self.renderer.flatten()
+                self.still_scene_changes = self.state.changes
+
+        # frame timings, if profiling with the overlay on
+        self.profiler.draw_overlay()
+
+        # repaint and show only the changed regions, or nothing at all if the frame is unchanged
+        self.renderer.present()
+    
+    def _queue_scene(self, alpha):
+        '''
+        Queue everything in the game, moving things alpha of the way between the last two physics steps
+        '''
+        self.lasers.draw(self.renderer, alpha)
+        self.ship.blitme(alpha)
+        self.aliens.draw(self.renderer, alpha)
 
         #draw the the score info
         self.sb.show_score()
 
-        # draw the play button if the game is inactive
-        if not self.game_active:
+        # draw the play button at the menu, it stays hidden for the game over pause
+        if self.state.current == MENU:
             self.play_button.draw_button()
 
-        # make the most recently drawn screen visible
-        pygame.display.flip()
-    
+    def _step(self, dt=None):
+        '''
+        Advance the game by one physics step of dt simulated seconds, the fixed step size unless given
+        '''
+        if dt is None:
+            dt = self.timer.step
+        # timed states like respawning count down on game time, so a pause never blocks the loop
+        self.state.update(dt)
+        if self.state.current == PLAYING:
+            self.controls.update(dt)
+            self.ship.update(dt)
+            self.profiler.mark(SHIP)
+            self._update_laser(dt)
+            self.profiler.mark(COLLISIONS)
+            self._update_aliens(dt)
+            self.profiler.mark(ALIENS)
+        self.frame += 1
+        self.sim_time += dt
+
     def run_game(self):
         '''
-        Start the main loop for the game
+        Start the main loop for the game, which runs until quit() is called
         '''
-        while True:
+        # real seconds the last frame took, which is how much game time the next frame has to simulate
+        elapsed = 0.0
+        while self.running:
+            self.profiler.begin_frame()
             self._check_events()
-            
-            if self.game_active:
-                self.ship.update()
-                self._update_laser()
-                self._update_aliens()
-            
-            self._update_screen()
-            # setting the frame rate. will try to loop 60x/s
-            self.clock.tick(60)
+            self.controls.poll()
+            self.profiler.mark(EVENTS)
+            if self.settings.fixed_step:
+                # run as many fixed steps as fit in the time that passed, and draw in between the last two
+                for _ in range(self.timer.advance(elapsed)):
+                    self._step()
+                self._update_screen(self.timer.alpha)
+            else:
+                self._step(min(elapsed, self.timer.max_frame_time))
+                self._update_screen()
+
+            if self.state.current == MENU:
+                # the menu only changes on input, so rather than drawing the same frame target_fps times a second
+                # sleep until there is some. The time spent waiting isn't game time
+                self._wait_for_event()
+                self.clock.tick()
+                elapsed = 0.0
+            else:
+                # setting the frame rate, 0 means as fast as possible. tick() tells us how long this frame took
+                elapsed = self.clock.tick(self.settings.target_fps) / 1000
+            self.profiler.mark(WAIT)
+            self.profiler.end_frame()
 
 if __name__ == '__main__':
+    # only needed when run as a script, importing the game from other modules skips it
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Play Alien Invasion")
+    parser.add_argument('--record', help="log this session's input to a file for replay.py")
+    parser.add_argument('--profile', nargs='?', const='', metavar='DUMP',
+        help="time every frame, show an FPS overlay, and write the timings to DUMP (.csv or .json) on exit")
+    parser.add_argument('--startup-report', action='store_true',
+        help="start up, show the first frame, print how long each part took and exit")
+    args = parser.parse_args()
+
+    settings = Settings()
+    if args.profile is not None:
+        settings.profile = True
+        settings.profile_dump_path = args.profile or None
+
     # make a game instance, and run the game
-    ai = AlienInvasion()
-    ai.run_game()
\ No newline at end of file
+    ai = AlienInvasion(settings=settings)
+    if args.startup_report:
+        ai._update_screen()
+        ai._startup_step('first frame')
+        print(ai.startup_report())
+        sys.exit()
+    if args.record:
+        from replay import InputRecorder
+        ai.recorder = InputRecorder(args.record)
+    try:
+        ai.run_game()
+    finally:
+        ai.high_scores.close()
+        if ai.recorder:
+            ai.recorder.close(ai.frame)
+        if ai.settings.profile_dump_path:
+            ai.profiler.dump(ai.settings.profile_dump_path)
\ No newline at end of file
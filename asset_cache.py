@@ -0,0 +1,138 @@
+import logging
+import os
+
+import pygame
+
+from atlas import read_atlas, source_stamp, PIXEL_FORMAT
+
+logger = logging.getLogger(__name__)
+
+class AssetCache:
+    '''
+    A class to load, scale and convert each game image once and share it across all sprites
+    '''
+    def __init__(self):
+        '''
+        Initialize the cache storage and the hit/miss counters
+        '''
+        # decoded images straight from disk, keyed by path
+        self.sources = {}
+        # finished surfaces, keyed by (path, size, convert mode)
+        self.surfaces = {}
+        # collision masks of scaled images, keyed by (path, size)
+        self.masks = {}
+        self.hits = 0
+        self.misses = 0
+        # surfaces that came from the sprite atlas rather than their own image files
+        self.atlas_sprites = 0
+
+    def load_atlas(self, path):
+        '''
+        Fill the cache from the sprite atlas at path, see atlas.py. Returns how many sprites it took from it.
+        Any image the atlas doesn't have, e.g. because it was built for another resolution or the image file
+        changed since, is still loaded from its own file by load(). So is everything if the atlas can't be read
+        '''
+        if path is None or not os.path.exists(path):
+            return 0
+        try:
+            surfaces = self._read_atlas(path)
+        except (OSError, ValueError, KeyError, IndexError, TypeError, pygame.error) as error:
+            # the atlas is a build product that can be stale or half written, the game doesn't need it to start
+            logger.warning("ignoring sprite atlas %s: %s", path, error)
+            return 0
+        self.surfaces.update(surfaces)
+        self.atlas_sprites += len(surfaces)
+        return len(surfaces)
+
+    def _read_atlas(self, path):
+        '''
+        Return the asset cache keys and surfaces of the sprites in the atlas at path whose image files still match
+        '''
+        index, data = read_atlas(path)
+        sheets = []
+        for sheet in index['sheets']:
+            pixels = data[sheet['offset']:sheet['offset'] + sheet['length']]
+            surface = pygame.image.frombuffer(pixels, tuple(sheet['size']), PIXEL_FORMAT)
+            # one conversion for the whole sheet, every sprite on it is a subsurface sharing its pixels
+            sheets.append(self._convert(surface, sheet['mode']))
+        surfaces = {}
+        for sprite in index['sprites']:
+            if sprite['source'] is None or sprite['source'] != source_stamp(sprite['path']):
+                continue
+            size = tuple(sprite['size']) if sprite['size'] is not None else None
+            key = (sprite['path'], size, sprite['mode'])
+            surfaces[key] = sheets[sprite['sheet']].subsurface(sprite['rect'])
+        return surfaces
+
+    def load(self, path, size=None, convert_mode='alpha'):
+        '''
+        Return the image at path scaled to size. Only the first request for a key touches the disk,
+        every later request gets the same shared surface back
+        '''
+        if size is not None:
+            # pygame truncates float sizes when scaling, so key on the size actually used
+            size = (int(size[0]), int(size[1]))
+        key = (path, size, convert_mode)
+
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self._load_source(path)
+        if size is not None:
+            surface = pygame.transform.scale(surface, size)
+        surface = self._convert(surface, convert_mode)
+        self.surfaces[key] = surface
+        return surface
+
+    def mask(self, path, size=None):
+        '''
+        Return the pixel collision mask of the image at path scaled to size, built once and shared like the images.
+        It comes from the image's own transparency, whichever way the image is converted for drawing
+        '''
+        if size is not None:
+            size = (int(size[0]), int(size[1]))
+        key = (path, size)
+        mask = self.masks.get(key)
+        if mask is None:
+            mask = pygame.mask.from_surface(self.load(path, size, 'alpha'))
+            self.masks[key] = mask
+        return mask
+
+    def _load_source(self, path):
+        '''
+        Decode an image file once, no matter how many sizes it is scaled to
+        '''
+        source = self.sources.get(path)
+        if source is None:
+            source = pygame.image.load(path)
+            self.sources[path] = source
+        return source
+
+    def _convert(self, surface, convert_mode):
+        '''
+        Convert the surface to the display's pixel format so blits don't convert it every frame
+        '''
+        # convert needs a display mode to be set, otherwise keep the surface as loaded
+        if convert_mode is None or pygame.display.get_surface() is None:
+            return surface
+        if convert_mode == 'alpha':
+            return surface.convert_alpha()
+        return surface.convert()
+
+    def clear(self):
+        '''
+        Drop every cached surface, e.g. after the display mode changes
+        '''
+        self.sources.clear()
+        self.surfaces.clear()
+        self.masks.clear()
+
+    def report(self):
+        '''
+        Return a short summary of how well the cache is doing
+        '''
+        return (f"assets: {len(self.surfaces)} cached ({self.atlas_sprites} from the atlas), "
+            f"{self.hits} hits, {self.misses} misses")
@@ -0,0 +1,147 @@
+'''
+Pre-baked sprite atlas. The build step plays a headless game at a given resolution, takes every image it loaded
+(already scaled to that resolution) and packs them into sheets in one file, with an index of where each one is.
+The game reads the whole file in one go and the asset cache hands out subsurfaces of the sheets, so no image
+is decoded or scaled at startup
+'''
+import argparse
+import json
+import os
+import struct
+
+import pygame
+
+# file header: magic, format version and the length of the JSON index that follows it. The sheets' pixels come after
+HEADER = struct.Struct('<4sHI')
+MAGIC = b'AIAT'
+# version 2 records each sprite's source file, so sprites of images changed since the build are left out
+VERSION = 2
+
+# 32-bit BGRA is the layout of most display surfaces, so converting a sheet after loading it is close to a copy
+PIXEL_FORMAT = 'BGRA'
+
+# sprites go side by side until a row reaches this width, then start a new row
+MAX_SHEET_WIDTH = 1024
+
+def pack(sizes):
+    '''
+    Shelf-pack rectangles of the given (width, height) sizes, tallest first. Returns the sheet size and
+    the (x, y) of each rectangle in the order given
+    '''
+    widths = [width for width, _ in sizes]
+    sheet_width = max(max(widths), min(sum(widths), MAX_SHEET_WIDTH))
+    order = sorted(range(len(sizes)), key=lambda index: -sizes[index][1])
+    positions = [None] * len(sizes)
+    x = y = shelf_height = 0
+    for index in order:
+        width, height = sizes[index]
+        if x + width > sheet_width:
+            # start a new shelf below the tallest sprite of this one
+            x, y = 0, y + shelf_height
+            shelf_height = 0
+        positions[index] = (x, y)
+        x += width
+        shelf_height = max(shelf_height, height)
+    return (sheet_width, y + shelf_height), positions
+
+def source_stamp(path):
+    '''
+    Return the modification time and size of the image file at path, or None if it can't be read.
+    The atlas stores it for each sprite, and a sprite whose file no longer matches is stale
+    '''
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+def write_atlas(path, surfaces, screen_size):
+    '''
+    Write surfaces, a dict of asset cache key -> surface, to an atlas file at path. Sprites are grouped into
+    one sheet per convert mode, so opaque sprites stay opaque once loaded
+    '''
+    by_mode = {}
+    for key in surfaces:
+        by_mode.setdefault(key[2], []).append(key)
+
+    index = {'screen': list(screen_size), 'sheets': [], 'sprites': []}
+    pixels = []
+    offset = 0
+    for mode, keys in by_mode.items():
+        (sheet_width, sheet_height), positions = pack([surfaces[key].get_size() for key in keys])
+        sheet = pygame.Surface((sheet_width, sheet_height), pygame.SRCALPHA)
+        for key, position in zip(keys, positions):
+            # copy the pixels as they are, blending onto the empty sheet would darken soft edges
+            sheet.blit(surfaces[key], position, special_flags=pygame.BLEND_RGBA_MAX)
+            image_path, size, _ = key
+            index['sprites'].append({
+                'path': image_path,
+                'size': size,
+                'mode': mode,
+                'sheet': len(index['sheets']),
+                'rect': [*position, *surfaces[key].get_size()],
+                'source': source_stamp(image_path),
+            })
+        data = pygame.image.tobytes(sheet, PIXEL_FORMAT)
+        index['sheets'].append({'mode': mode, 'size': [sheet_width, sheet_height], 'offset': offset,
+            'length': len(data)})
+        pixels.append(data)
+        offset += len(data)
+
+    index_data = json.dumps(index).encode()
+    with open(path, 'wb') as atlas:
+        atlas.write(HEADER.pack(MAGIC, VERSION, len(index_data)))
+        atlas.write(index_data)
+        for data in pixels:
+            atlas.write(data)
+    return index
+
+def read_atlas(path):
+    '''
+    Read an atlas file in a single read. Returns its index and a memoryview of the sheets' pixel data.
+    Raises ValueError if the file isn't a whole atlas of this version
+    '''
+    with open(path, 'rb') as atlas:
+        data = memoryview(atlas.read())
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is too short to be a sprite atlas")
+    magic, version, index_length = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} sprite atlas")
+    start = HEADER.size
+    index = json.loads(bytes(data[start:start + index_length]))
+    pixels = data[start + index_length:]
+    # a build cut short leaves the file without all of its pixels
+    if sum(sheet['length'] for sheet in index['sheets']) > len(pixels):
+        raise ValueError(f"{path} is truncated")
+    return index, pixels
+
+def build_atlas(path, settings):
+    '''
+    Build the atlas for settings' resolution from the images a headless game loads while starting and playing
+    '''
+    # imported here, the game imports this module itself through the asset cache
+    from alien_invasion import AlienInvasion
+
+    # load from the image files, not from an atlas built earlier
+    settings.atlas_path = None
+    ai_game = AlienInvasion(headless=True, settings=settings)
+    ai_game._start_game()
+    return write_atlas(path, ai_game.assets.surfaces, (settings.screen_width, settings.screen_height))
+
+if __name__ == '__main__':
+    from settings import Settings
+
+    settings = Settings()
+    parser = argparse.ArgumentParser(description="Pack the game's scaled sprites into a single atlas file")
+    parser.add_argument('--out', default=settings.atlas_path, help="atlas file to write")
+    parser.add_argument('--width', type=int, default=settings.screen_width, help="screen width to scale for")
+    parser.add_argument('--height', type=int, default=settings.screen_height, help="screen height to scale for")
+    args = parser.parse_args()
+
+    settings.screen_width, settings.screen_height = args.width, args.height
+    index = build_atlas(args.out, settings)
+    for sprite in index['sprites']:
+        print(f"{sprite['path']:<36} {str(sprite['size']):<12} {sprite['mode']:<7} at {sprite['rect']}")
+    sheets = ', '.join(f"{width}x{height}" for width, height in (sheet['size'] for sheet in index['sheets']))
+    print(f"{len(index['sprites'])} sprites in {len(index['sheets'])} sheets ({sheets}) written to {args.out}")
@@ -0,0 +1,128 @@
+import argparse
+import itertools
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from results import write_table
+from settings import Settings
+
+class SweptSettings(Settings):
+    '''
+    Settings with some values overridden for a sweep. The overrides are applied again whenever the dynamic
+    settings are reset, which every new game does, so overriding e.g. alien_speed holds from the first level
+    '''
+    def __init__(self, overrides):
+        '''
+        Initialize the default settings, with overrides on top
+        '''
+        # set before the defaults, which finish by initializing the dynamic settings
+        self.overrides = overrides
+        super().__init__()
+
+    def initialize_dynamic_settings(self):
+        super().initialize_dynamic_settings()
+        for name, value in self.overrides.items():
+            setattr(self, name, value)
+
+def _parse_grid(entries):
+    '''
+    Turn ['speed_up_scale=1.1,1.2', ...] into {'speed_up_scale': [1.1, 1.2], ...}
+    '''
+    defaults = Settings()
+    grid = {}
+    for entry in entries:
+        name, _, values = entry.partition('=')
+        if not hasattr(defaults, name):
+            raise ValueError(f"unknown setting {name!r}")
+        grid[name] = [json.loads(value) for value in values.split(',')]
+    return grid
+
+def _expand(grid):
+    '''
+    Return one dict of setting overrides per combination of grid values
+    '''
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+
+def play_game(job):
+    '''
+    Play one headless game in a worker process and return its result. job is (overrides, policy spec, max frames,
+    seed). The seed is for the policy, the game itself plays out the same every time
+    '''
+    # imported here so only the workers pay for pygame and the game modules
+    from alien_invasion import AlienInvasion
+    from headless import load_policy, run_headless
+
+    overrides, policy_spec, max_frames, seed = job
+    random.seed(seed)
+    ai_game = AlienInvasion(headless=True, settings=SweptSettings(overrides))
+    report = run_headless(max_frames, ai_game=ai_game, policy=load_policy(policy_spec))
+    return {**overrides, 'seed': seed, 'score': report['score'], 'level': report['level'], 'frames': report['frames']}
+
+def summarize(results, names):
+    '''
+    Aggregate the results per combination of settings
+    '''
+    groups = {}
+    for result in results:
+        key = tuple(result[name] for name in names)
+        groups.setdefault(key, []).append(result)
+
+    summary = []
+    for key, games in groups.items():
+        row = dict(zip(names, key))
+        row['games'] = len(games)
+        for stat in ('score', 'level', 'frames'):
+            values = [game[stat] for game in games]
+            row[f'mean_{stat}'] = sum(values) / len(values)
+            row[f'max_{stat}'] = max(values)
+        summary.append(row)
+    return summary
+
+def run_batch(grid, policy_spec='policies:jittery', games=10, max_frames=100_000, workers=None, seed=0):
+    '''
+    Play games games for every combination of settings in grid, spread over a pool of worker processes,
+    one per core unless workers says otherwise. Returns the per-game results
+    '''
+    overrides = _expand(grid)
+    # every combination gets the same seeds, so differences between combinations come from the settings
+    jobs = [(override, policy_spec, max_frames, seed + game) for override in overrides for game in range(games)]
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # hand the jobs out in chunks so each worker isn't waiting on the parent for every game
+        chunksize = max(1, len(jobs) // (workers * 4))
+        return list(executor.map(play_game, jobs, chunksize=chunksize))
+
+def write_results(path, summary, results):
+    '''
+    Write the results to path: the summary and every game as JSON if it ends in .json, the summary as CSV otherwise
+    '''
+    write_table(path, summary, {'summary': summary, 'games': results})
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Play many headless games in parallel over a grid of settings")
+    parser.add_argument('grid', nargs='*', metavar='SETTING=V1,V2',
+        help="settings to sweep, e.g. speed_up_scale=1.1,1.2 fleet_drop_speed=100,200")
+    parser.add_argument('--policy', default='policies:jittery',
+        help="module:function that plays the games. Repeated games only differ if it uses the random module")
+    parser.add_argument('--games', type=int, default=10, help="games per combination of settings")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game of each combination")
+    parser.add_argument('--frames', type=int, default=100_000, help="stop each game after this many frames")
+    parser.add_argument('--workers', type=int, help="worker processes, defaults to one per core")
+    parser.add_argument('--out', default='batch_results.csv', help="results file, .csv or .json")
+    args = parser.parse_args()
+
+    grid = _parse_grid(args.grid)
+    start = perf_counter()
+    results = run_batch(grid, args.policy, args.games, args.frames, args.workers, args.seed)
+    elapsed = perf_counter() - start
+
+    summary = summarize(results, list(grid))
+    write_results(args.out, summary, results)
+    frames = sum(result['frames'] for result in results)
+    print(f"{len(results)} games, {frames:,} frames in {elapsed:.1f}s "
+          f"({len(results) / elapsed:.1f} games/s, {frames / elapsed:,.0f} frames/s)")
+    print(f"results written to {args.out}")
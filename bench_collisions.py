@@ -0,0 +1,92 @@
+import argparse
+from time import perf_counter
+
+import numpy as np
+import pygame
+
+from alien_invasion import AlienInvasion
+
+def scatter_fleet(ai_game, num_aliens, rng):
+    '''
+    Fill the fleet with num_aliens aliens at random positions in the top part of the screen
+    '''
+    fleet = ai_game.aliens
+    x = rng.uniform(0, ai_game.settings.screen_width - fleet.width, num_aliens)
+    y = rng.uniform(0, ai_game.settings.screen_height * .6, num_aliens)
+    fleet.build(np.column_stack((x, y)))
+
+def scatter_lasers(ai_game, num_lasers, rng):
+    '''
+    Replace the lasers with num_lasers lasers at random positions
+    '''
+    x = rng.uniform(0, ai_game.settings.screen_width, num_lasers).astype(int)
+    y = rng.uniform(0, ai_game.settings.screen_height, num_lasers).astype(int)
+    ai_game.lasers.build(np.column_stack((x, y)))
+
+def brute_force_collisions(lasers, fleet):
+    '''
+    Check every laser against every alien, the way pygame.sprite.groupcollide with collide_mask does.
+    Returns the same laser index -> aliens dict as Fleet.collide_lasers
+    '''
+    aliens = fleet.sprites()
+    alien_rects = [alien.rect for alien in aliens]
+    collisions = {}
+    for index, rect in enumerate(lasers.rects()):
+        hits = [hit for hit in pygame.Rect(rect).collidelistall(alien_rects)
+            if aliens[hit].mask.overlap(lasers.mask, (rect[0] - alien_rects[hit].x, rect[1] - alien_rects[hit].y))]
+        if hits:
+            collisions[index] = sorted((aliens[hit] for hit in hits), key=lambda alien: alien.index)
+    return collisions
+
+def _time(function, repeats, setup):
+    '''
+    Return the best time of repeats calls to function, each one straight after an untimed call to setup
+    '''
+    best = float('inf')
+    for _ in range(repeats):
+        setup()
+        start = perf_counter()
+        function()
+        best = min(best, perf_counter() - start)
+    return best
+
+def run_benchmark(fleet_sizes, laser_counts, repeats=5, seed=0):
+    '''
+    Time laser/alien and ship/alien collisions with brute force checks and with the fleet's own checks
+    (a sweep along x for the lasers, the spatial hash for the ship), and check that both give the same answer
+    '''
+    ai_game = AlienInvasion(headless=True)
+    rng = np.random.default_rng(seed)
+    rows = []
+    for num_aliens in fleet_sizes:
+        scatter_fleet(ai_game, num_aliens, rng)
+        for num_lasers in laser_counts:
+            scatter_lasers(ai_game, num_lasers, rng)
+            lasers, fleet = ai_game.lasers, ai_game.aliens
+
+            # the fleet moves a step before every timed call, so the spatial hash has to catch up each time
+            # like in a real frame
+            move = lambda: fleet.update(ai_game.timer.step)
+            brute_time = _time(lambda: brute_force_collisions(lasers, fleet), repeats, move)
+            hash_time = _time(lambda: fleet.collide_lasers(lasers, False, False), repeats, move)
+            assert brute_force_collisions(lasers, fleet) == fleet.collide_lasers(lasers, False, False), \
+                "fleet disagrees with the brute force check"
+
+            ship_brute_time = _time(lambda: pygame.sprite.spritecollideany(ai_game.ship, fleet,
+                pygame.sprite.collide_mask), repeats, move)
+            ship_hash_time = _time(lambda: fleet.spritecollideany(ai_game.ship), repeats, move)
+
+            rows.append((num_aliens, num_lasers, brute_time, hash_time, ship_brute_time, ship_hash_time))
+    return rows
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare brute force collision checks with the fleet's")
+    parser.add_argument('--aliens', type=int, nargs='+', default=[20, 200, 2000])
+    parser.add_argument('--lasers', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'aliens':>7} {'lasers':>7} {'brute force':>13} {'fleet':>9} {'speedup':>8} {'ship any':>9} {'ship hash':>10}")
+    for aliens, lasers, brute, hashed, ship_brute, ship_hashed in run_benchmark(args.aliens, args.lasers, args.repeats):
+        print(f"{aliens:>7} {lasers:>7} {brute * 1000:>11.3f}ms {hashed * 1000:>7.3f}ms {brute / hashed:>7.1f}x"
+              f" {ship_brute * 1000:>7.3f}ms {ship_hashed * 1000:>8.3f}ms")
@@ -0,0 +1,132 @@
+import argparse
+import platform
+import time
+from time import perf_counter
+
+import numpy as np
+import pygame
+
+from alien_invasion import AlienInvasion
+from bench_collisions import scatter_fleet, scatter_lasers
+from results import write_table
+from settings import Settings
+
+PHASES = ('update_aliens', 'laser_collisions', 'update_screen')
+
+def _stress_game(width, height, num_lasers):
+    '''
+    Make a headless game at width x height that allows num_lasers lasers. The fleet never drops,
+    so a stress fleet stays on screen for the whole run instead of reaching the ship
+    '''
+    settings = Settings()
+    settings.screen_width = width
+    settings.screen_height = height
+    settings.laser_max_num = num_lasers
+    settings.fleet_drop_speed = 0
+    ai_game = AlienInvasion(headless=True, settings=settings)
+    ai_game._start_game()
+    return ai_game
+
+def _restore(ai_game, num_aliens, num_lasers, rng):
+    '''
+    Bring back the aliens and lasers the last frame destroyed, so every frame is timed at full size
+    '''
+    fleet = ai_game.aliens
+    if len(fleet.members) == num_aliens:
+        fleet.reset(np.column_stack((fleet.x, fleet.y)))
+    else:
+        # the whole fleet was shot down and replaced by a normal one, start over
+        scatter_fleet(ai_game, num_aliens, rng)
+    if len(ai_game.lasers) < num_lasers:
+        scatter_lasers(ai_game, num_lasers, rng)
+
+def _stats(times):
+    '''
+    Mean, median and worst time in milliseconds
+    '''
+    ordered = sorted(times)
+    return {
+        'mean_ms': sum(ordered) / len(ordered) * 1000,
+        'p50_ms': ordered[len(ordered) // 2] * 1000,
+        'max_ms': ordered[-1] * 1000,
+    }
+
+def run_case(width, height, num_aliens, num_lasers, frames, seed=0):
+    '''
+    Time the fleet update, laser collisions and drawing separately over frames frames
+    '''
+    rng = np.random.default_rng(seed)
+    ai_game = _stress_game(width, height, num_lasers)
+    scatter_fleet(ai_game, num_aliens, rng)
+    scatter_lasers(ai_game, num_lasers, rng)
+    dt = ai_game.timer.step
+
+    times = {phase: [] for phase in PHASES}
+    for _ in range(frames):
+        _restore(ai_game, num_aliens, num_lasers, rng)
+        ai_game.lasers.update(dt)
+
+        start = perf_counter()
+        ai_game._update_aliens(dt)
+        middle = perf_counter()
+        ai_game._check_laser_alien_collisions()
+        end = perf_counter()
+        ai_game._update_screen()
+        drawn = perf_counter()
+
+        times['update_aliens'].append(middle - start)
+        times['laser_collisions'].append(end - middle)
+        times['update_screen'].append(drawn - end)
+
+    result = {'width': width, 'height': height, 'aliens': num_aliens, 'lasers': num_lasers, 'frames': frames}
+    for phase in PHASES:
+        for stat, value in _stats(times[phase]).items():
+            result[f'{phase}_{stat}'] = value
+    return result
+
+def run_suite(resolutions, fleet_sizes, laser_counts, frames):
+    '''
+    Run every combination of resolution, fleet size and laser count
+    '''
+    results = []
+    for width, height in resolutions:
+        for num_aliens in fleet_sizes:
+            for num_lasers in laser_counts:
+                results.append(run_case(width, height, num_aliens, num_lasers, frames))
+                print(_format(results[-1]), flush=True)
+    return results
+
+def _format(result):
+    phases = '  '.join(f"{phase} {result[f'{phase}_mean_ms']:8.3f}ms" for phase in PHASES)
+    return f"{result['width']}x{result['height']} {result['aliens']:>6} aliens {result['lasers']:>4} lasers  {phases}"
+
+def write_results(path, results):
+    '''
+    Write the results with a description of the build and machine, as JSON if path ends in .json and CSV otherwise
+    '''
+    write_table(path, results, {
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': platform.platform(),
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'numpy': np.__version__,
+        'results': results,
+    })
+
+def _resolution(text):
+    width, _, height = text.partition('x')
+    return int(width), int(height)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure how the game scales with fleet size, lasers and resolution")
+    parser.add_argument('--aliens', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--lasers', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--resolutions', type=_resolution, nargs='+', default=[(1200, 650), (1920, 1080)],
+        metavar='WxH')
+    parser.add_argument('--frames', type=int, default=60, help="frames timed per case")
+    parser.add_argument('--out', default='bench_scaling.json', help="results file, .json or .csv")
+    args = parser.parse_args()
+
+    results = run_suite(args.resolutions, args.aliens, args.lasers, args.frames)
+    write_results(args.out, results)
+    print(f"results written to {args.out}")
@@ -8,14 +8,14 @@ class Button:
         '''
         Initialize the button attributes
         '''
-        self.screen = ai_game.screen
-        self.screen_rect =self.screen.get_rect()
+        self.renderer = ai_game.renderer
+        self.screen_rect = ai_game.screen_rect
 
         # Set the dimensions and properties of the button
         self.width, self.height = 200, 50
         self.button_color = (0, 135, 0)
         self.text_color = (255, 255, 255)
-        self.font = pygame.font.SysFont(None, 48)
+        self.font = ai_game.fonts.get(None, 48)
 
         # Build the button's rect object and center it
         self.rect = pygame.Rect(0, 0, self.width, self.height)
@@ -36,6 +36,6 @@ class Button:
         '''
         Draw blank button and then draw message
         '''
-        self.screen.fill(self.button_color, self.rect)
-        self.screen.blit(self.msg_image, self.msg_image_rect)
+        self.renderer.queue(self.button_color, self.rect)
+        self.renderer.queue(self.msg_image, self.msg_image_rect)
         
@@ -0,0 +1,88 @@
+import pygame
+
+# the only events the game reacts to, everything else (mouse motion, window and text events...) is kept out of
+# the event queue altogether. Window exposure is let through so the renderer can repaint what was hidden
+ALLOWED_EVENTS = [pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN, pygame.WINDOWEXPOSED]
+
+class Controls:
+    '''
+    A class to turn the keyboard into game actions. Settings.keymap maps key names to actions, and each
+    action is looked up in a dispatch table instead of a chain of key checks. Movement and firing follow
+    whether their keys are held, polled once per frame, and holding fire keeps shooting at a limited rate
+    '''
+    def __init__(self, ai_game):
+        '''
+        Initialize the key bindings and the dispatch table
+        '''
+        self.ai_game = ai_game
+        self.settings = ai_game.settings
+
+        # key code -> action, built once from the key names in the settings
+        self.keymap = {pygame.key.key_code(name): action for name, action in self.settings.keymap.items()}
+        # what an action does the moment its key goes down, on top of counting as held
+        self.on_press = {
+            'fire': self._fire,
+            'quit': self._quit,
+        }
+
+        # actions whose keys are down, and seconds of game time until holding fire shoots again
+        self.held = set()
+        self.fire_cooldown = 0.0
+        # a live game reads the keyboard itself, replays and headless games only go by the events they're fed
+        self.live = not ai_game.headless
+
+    def handle_event(self, event):
+        '''
+        Respond to a key going down or up
+        '''
+        action = self.keymap.get(event.key)
+        if action is None:
+            return
+        if event.type == pygame.KEYDOWN:
+            self.held.add(action)
+            press = self.on_press.get(action)
+            if press:
+                press()
+        else:
+            self.held.discard(action)
+        self._steer()
+
+    def quits(self, event):
+        '''
+        Return True if event is a key press that quits the game
+        '''
+        return event.type == pygame.KEYDOWN and self.keymap.get(event.key) == 'quit'
+
+    def poll(self):
+        '''
+        Read which keys are held from the keyboard, once per frame after the events were handled
+        '''
+        if not self.live:
+            return
+        pressed = pygame.key.get_pressed()
+        self.held = {action for key, action in self.keymap.items() if pressed[key]}
+        self._steer()
+
+    def update(self, dt):
+        '''
+        Keep firing while fire is held, no faster than Settings.auto_fire_rate shots per second of game time
+        '''
+        if self.fire_cooldown > 0:
+            self.fire_cooldown -= dt
+        if 'fire' in self.held and self.settings.auto_fire_rate and self.fire_cooldown <= 0:
+            self.ai_game._fire_laser()
+            # carry over what's left of this step, so shots keep to the rate instead of drifting later
+            self.fire_cooldown += 1 / self.settings.auto_fire_rate
+
+    def _steer(self):
+        self.ai_game.ship.moving_right = 'move_right' in self.held
+        self.ai_game.ship.moving_left = 'move_left' in self.held
+
+    def _fire(self):
+        # a key press always shoots, holding the key then waits out the cooldown before the next shot
+        self.ai_game._fire_laser()
+        if self.settings.auto_fire_rate:
+            self.fire_cooldown = 1 / self.settings.auto_fire_rate
+
+    def _quit(self):
+        self.ai_game.quit()
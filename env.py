@@ -0,0 +1,187 @@
+'''
+A reinforcement learning environment over the game, in the style of Gymnasium's reset()/step() API, and a
+vectorized wrapper that steps several games per call. Each environment is a headless game driven one physics
+step (or frame_skip steps) per action, with no window, no event loop and no frame rate cap
+'''
+import argparse
+import copy
+from time import perf_counter
+
+import numpy as np
+import pygame
+
+from alien_invasion import AlienInvasion
+
+# the actions an agent picks from, as (move, fire): move is -1 for left, 1 for right or 0 to stay put
+ACTIONS = [(0, False), (-1, False), (1, False), (0, True), (-1, True), (1, True)]
+
+class AlienInvasionEnv:
+    '''
+    One game as an environment. observation is 'state' for a compact vector of positions, or 'pixels'
+    for the screen shrunk by a factor of downsample
+    '''
+    def __init__(self, settings=None, observation='state', frame_skip=1, max_aliens=64, downsample=4,
+            max_steps=None):
+        '''
+        Initialize the game. State vectors have room for max_aliens aliens, and an episode is cut short
+        after max_steps actions if given
+        '''
+        if observation not in ('state', 'pixels'):
+            raise ValueError(f"observation must be 'state' or 'pixels', not {observation!r}")
+        self.ai_game = AlienInvasion(headless=True, settings=settings)
+        self.settings = self.ai_game.settings
+        self.observation = observation
+        self.frame_skip = frame_skip
+        self.max_aliens = max_aliens
+        self.max_lasers = self.settings.laser_max_num
+        self.downsample = downsample
+        self.max_steps = max_steps
+        self.steps = 0
+
+        self.action_count = len(ACTIONS)
+        if observation == 'state':
+            # ship x and fleet direction, then x, y and a present flag for each alien and each laser
+            self.observation_shape = (2 + 3 * (self.max_aliens + self.max_lasers),)
+        else:
+            width, height = self.ai_game.screen.get_size()
+            self.observation_shape = (-(-height // downsample), -(-width // downsample), 3)
+
+    def reset(self):
+        '''
+        Start a new game. Returns the first observation and an info dict
+        '''
+        self.ai_game._start_game()
+        self.steps = 0
+        return self._observe(), self._info()
+
+    def step(self, action):
+        '''
+        Take action, an index into ACTIONS, for frame_skip physics steps. Returns the observation, the reward
+        (points scored), whether the game is over, whether the episode was cut short at max_steps, and an info dict
+        '''
+        ai_game = self.ai_game
+        score = ai_game.stats.score
+        move, fire = ACTIONS[action]
+        for _ in range(self.frame_skip):
+            ai_game._apply_action(move, fire)
+            # fire once per action, not once per physics step
+            fire = False
+            ai_game._step()
+            if not ai_game.game_active:
+                break
+        self.steps += 1
+
+        terminated = not ai_game.game_active
+        truncated = not terminated and self.max_steps is not None and self.steps >= self.max_steps
+        return self._observe(), ai_game.stats.score - score, terminated, truncated, self._info()
+
+    def _info(self):
+        stats = self.ai_game.stats
+        return {'score': stats.score, 'level': stats.level, 'ships_left': stats.ships_left,
+            'frame': self.ai_game.frame}
+
+    def _observe(self):
+        if self.observation == 'state':
+            return self._state()
+        return self._pixels()
+
+    def _state(self):
+        '''
+        The game as a vector of numbers between about -1 and 1: positions are divided by the screen size
+        '''
+        ai_game = self.ai_game
+        width, height = self.settings.screen_width, self.settings.screen_height
+        state = np.zeros(self.observation_shape, dtype=np.float32)
+        state[0] = ai_game.ship.rect.centerx / width
+        state[1] = self.settings.fleet_direction
+
+        fleet = ai_game.aliens
+        count = min(len(fleet.x), self.max_aliens)
+        aliens = state[2:2 + 3 * self.max_aliens].reshape(-1, 3)
+        aliens[:count, 0] = fleet.x[:count] / width
+        aliens[:count, 1] = fleet.y[:count] / height
+        aliens[:count, 2] = fleet.alive[:count]
+
+        lasers = ai_game.lasers
+        count = min(len(lasers), self.max_lasers)
+        laser_rows = state[2 + 3 * self.max_aliens:].reshape(-1, 3)
+        laser_rows[:count, 0] = lasers.x[:count] / width
+        laser_rows[:count, 1] = lasers.y[:count] / height
+        laser_rows[:count, 2] = 1
+        return state
+
+    def _pixels(self):
+        '''
+        Draw the game and return every downsample-th pixel of the screen as a (height, width, 3) array
+        '''
+        self.ai_game._update_screen()
+        # pixels3d is a view of the screen's own memory, only the sampled pixels are copied out of it
+        pixels = pygame.surfarray.pixels3d(self.ai_game.screen)
+        frame = np.ascontiguousarray(pixels[::self.downsample, ::self.downsample].transpose(1, 0, 2))
+        # the view locks the screen, let go of it before the next frame is drawn
+        del pixels
+        return frame
+
+class VectorEnv:
+    '''
+    Several environments stepped together. Observations, rewards and flags come back stacked, one row per game.
+    A game that ends is reset straight away, and its last observation is kept in its info as 'final_observation'
+    '''
+    def __init__(self, num_envs, **env_args):
+        '''
+        Make num_envs environments, each with env_args
+        '''
+        settings = env_args.pop('settings', None)
+        # every game gets its own copy of the settings, a game changes them as it speeds up
+        self.envs = [AlienInvasionEnv(settings=copy.deepcopy(settings), **env_args) for _ in range(num_envs)]
+        self.num_envs = num_envs
+        self.action_count = self.envs[0].action_count
+        self.observation_shape = (num_envs,) + self.envs[0].observation_shape
+
+    def reset(self):
+        '''
+        Start every game. Returns the stacked observations and a list of info dicts
+        '''
+        observations, infos = zip(*(env.reset() for env in self.envs))
+        return np.stack(observations), list(infos)
+
+    def step(self, actions):
+        '''
+        Take one action per game. Returns stacked observations, rewards, terminated and truncated flags, and infos
+        '''
+        observations = []
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        terminated = np.zeros(self.num_envs, dtype=bool)
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        infos = []
+        for index, (env, action) in enumerate(zip(self.envs, actions)):
+            observation, rewards[index], terminated[index], truncated[index], info = env.step(int(action))
+            if terminated[index] or truncated[index]:
+                info['final_observation'] = observation
+                observation, reset_info = env.reset()
+                info['reset_info'] = reset_info
+            observations.append(observation)
+            infos.append(info)
+        return np.stack(observations), rewards, terminated, truncated, infos
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure how fast the environment steps with random actions")
+    parser.add_argument('--envs', type=int, default=8, help="games stepped together")
+    parser.add_argument('--steps', type=int, default=10_000, help="vector steps to take")
+    parser.add_argument('--observation', choices=('state', 'pixels'), default='state')
+    parser.add_argument('--frame-skip', type=int, default=1)
+    args = parser.parse_args()
+
+    vector_env = VectorEnv(args.envs, observation=args.observation, frame_skip=args.frame_skip)
+    rng = np.random.default_rng(0)
+    vector_env.reset()
+    episodes = 0
+    start = perf_counter()
+    for _ in range(args.steps):
+        _, _, terminated, truncated, _ = vector_env.step(rng.integers(vector_env.action_count, size=args.envs))
+        episodes += np.count_nonzero(terminated | truncated)
+    wall_time = perf_counter() - start
+
+    total = args.steps * args.envs
+    print(f"{total:,} environment steps in {wall_time:.2f}s, {total / wall_time:,.0f} steps per second, "
+          f"{episodes} episodes finished")
@@ -0,0 +1,297 @@
+import numpy as np
+from pygame.sprite import Group
+
+from alien import Alien, ALIEN_IMAGE, image_size
+from pixels import round_pixels, round_pixel
+from spatial_hash import SpatialHash
+
+# marks a grid_bounds row whose alien is not in the spatial hash
+NOT_IN_GRID = -(2 ** 31)
+
+# up to this many laser/alien pairs, testing every pair directly is quicker than setting up the sweep
+DIRECT_COLLISION_PAIRS = 256
+
+class Fleet(Group):
+    '''
+    A sprite group for the alien fleet. Positions and alive flags live in NumPy arrays, so moving,
+    edge checks, dropping down and bottom checks are one array operation per frame for the whole fleet
+    '''
+    def __init__(self, ai_game):
+        '''
+        Initialize an empty fleet
+        '''
+        super().__init__()
+        self.ai_game = ai_game
+        self.settings = ai_game.settings
+        self.screen_rect = ai_game.screen_rect
+
+        # the size is known from the settings, the image itself is only decoded when the first fleet is built,
+        # so the menu comes up without it
+        self.assets = ai_game.assets
+        self.image = None
+        self.mask = None
+        self.width, self.height = image_size(self.settings)
+
+        # one entry per alien: exact position, and whether it is still in the fleet
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.alive = np.zeros(0, dtype=bool)
+        self.members = []
+        # positions before the last update, for drawing in between physics steps
+        self.prev_x = np.zeros(0)
+        self.prev_y = np.zeros(0)
+        # every Alien handle ever made, reused by later fleets instead of allocating new ones
+        self.pool = []
+
+        # broadphase for collisions: cells about one alien big, and the cells each alien was last stored under
+        self.grid = SpatialHash(max(self.width, self.height))
+        self.grid_bounds = np.zeros((0, 4), dtype=int)
+        self._grid_stale = False
+
+    def build(self, positions):
+        '''
+        Replace the fleet with one alien at each (x, y) position
+        '''
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        count = len(positions)
+        if self.image is None:
+            self.image = self.assets.load(ALIEN_IMAGE, (self.width, self.height))
+            # collisions are checked against the alien's own shape, not the whole square it's drawn in
+            self.mask = self.assets.mask(ALIEN_IMAGE, (self.width, self.height))
+        # empty first, so the old aliens are marked dead in the old arrays
+        self.empty()
+        self.grid.clear()
+        self.x = positions[:, 0].copy()
+        self.y = positions[:, 1].copy()
+        self.alive = np.ones(count, dtype=bool)
+        self.grid_bounds = np.full((count, 4), NOT_IN_GRID, dtype=int)
+        self.prev_x = self.x.copy()
+        self.prev_y = self.y.copy()
+        self._grid_stale = True
+
+        # Alien handles only know their index, so the first count of them can be reused as they are
+        while len(self.pool) < count:
+            self.pool.append(Alien(self, len(self.pool)))
+        self.members = self.pool[:count]
+        self.add(self.members)
+
+    def reset(self, positions):
+        '''
+        Put the fleet back at positions. If it is the same size as the current fleet, e.g. every level of a
+        normal game, surviving aliens are just moved and only the dead ones are added back
+        '''
+        if len(positions) != len(self.members):
+            self.build(positions)
+            return
+        self.x[:] = positions[:, 0]
+        self.y[:] = positions[:, 1]
+        self.prev_x[:] = self.x
+        self.prev_y[:] = self.y
+        self._grid_stale = True
+        self.add([self.members[index] for index in np.flatnonzero(~self.alive).tolist()])
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self.alive[sprite.index] = True
+        self._grid_stale = True
+
+    def remove_internal(self, sprite):
+        # called by kill(), remove() and empty(), so collision code can keep killing aliens as usual
+        super().remove_internal(sprite)
+        self.alive[sprite.index] = False
+        self.grid.remove(sprite.index)
+        self.grid_bounds[sprite.index] = NOT_IN_GRID
+
+    def update(self, dt):
+        '''
+        Move the whole fleet sideways for dt seconds
+        '''
+        # a drop since the last update isn't interpolated, the fleet jumps down like it always has
+        self.prev_x[:] = self.x
+        self.prev_y[:] = self.y
+        self.x += self.settings.alien_speed * self.settings.fleet_direction * dt
+        self._grid_stale = True
+
+    def check_edges(self):
+        '''
+        Return True if any alien is at the edge of the screen
+        '''
+        left = round_pixels(self.x[self.alive])
+        return bool(np.any((left + self.width >= self.screen_rect.right) | (left <= 0)))
+
+    def drop(self):
+        '''
+        Drop the whole fleet down
+        '''
+        self.y += self.settings.fleet_drop_speed
+        self._grid_stale = True
+
+    def reached_bottom(self):
+        '''
+        Return True if any alien has reached the bottom of the screen
+        '''
+        return bool(np.any(round_pixels(self.y[self.alive]) + self.height >= self.settings.screen_height))
+
+    def draw(self, renderer, alpha=1.0):
+        '''
+        Queue every alien still in the fleet for drawing in one batch, alpha of the way from their
+        previous positions to their current ones
+        '''
+        alive = self.alive
+        count = np.count_nonzero(alive)
+        x = self.prev_x[alive] + (self.x[alive] - self.prev_x[alive]) * alpha
+        y = self.prev_y[alive] + (self.y[alive] - self.prev_y[alive]) * alpha
+        rects = np.column_stack((round_pixels(x), round_pixels(y),
+            np.full(count, self.width), np.full(count, self.height))).tolist()
+        renderer.queue_many(self.image, rects)
+
+    def _sync_grid(self):
+        '''
+        Bring the spatial hash up to date. Only aliens that moved into a different cell are touched
+        '''
+        if not self._grid_stale:
+            return
+        self._grid_stale = False
+
+        size = self.grid.cell_size
+        left = round_pixels(self.x)
+        top = round_pixels(self.y)
+        bounds = np.column_stack((left // size, top // size,
+            (left + self.width - 1) // size, (top + self.height - 1) // size))
+        changed = np.flatnonzero(self.alive & np.any(bounds != self.grid_bounds, axis=1))
+        for index, alien_bounds in zip(changed.tolist(), bounds[changed].tolist()):
+            self.grid.place(index, tuple(alien_bounds))
+        self.grid_bounds[changed] = bounds[changed]
+
+    def _hits(self, rect, mask=None):
+        '''
+        Return the indices of the aliens overlapping rect, in fleet order. With a mask for whatever
+        is at rect, only aliens whose pixels actually touch it count
+        '''
+        self._sync_grid()
+        hits = []
+        for index in sorted(self.grid.query(rect)):
+            left = int(round_pixels(self.x[index]))
+            top = int(round_pixels(self.y[index]))
+            if not (rect.left < left + self.width and rect.right > left
+                    and rect.top < top + self.height and rect.bottom > top):
+                continue
+            # the pixel check is only done once the rects overlap, which is rare
+            if mask is not None and self.mask.overlap(mask, (rect.left - left, rect.top - top)) is None:
+                continue
+            hits.append(index)
+        return hits
+
+    def spritecollide(self, sprite, dokill):
+        '''
+        Return the aliens hit by sprite, like pygame.sprite.spritecollide but using the spatial hash.
+        If sprite has a mask, the check is pixel accurate like pygame.sprite.collide_mask
+        '''
+        aliens = [self.members[index] for index in self._hits(sprite.rect, getattr(sprite, 'mask', None))]
+        if dokill:
+            for alien in aliens:
+                alien.kill()
+        return aliens
+
+    def spritecollideany(self, sprite):
+        '''
+        Return an alien hit by sprite, or None, like pygame.sprite.spritecollideany. Pixel accurate if sprite has a mask
+        '''
+        hits = self._hits(sprite.rect, getattr(sprite, 'mask', None))
+        return self.members[hits[0]] if hits else None
+
+    def collide_lasers(self, lasers, dokill_lasers, dokill_fleet):
+        '''
+        Return a dict mapping the index of each laser in lasers that hit something to the aliens it hit.
+        Lasers are checked in the order they were fired, like pygame.sprite.groupcollide(lasers, fleet, ...)
+        would if they were sprites, so an alien killed by one laser can't be hit by a later one.
+        Hits are pixel accurate, a laser passing through an empty corner of an alien's square misses
+        '''
+        # the group holds exactly the aliens still alive
+        if not len(lasers) or not len(self):
+            return {}
+        if len(lasers) * len(self) <= DIRECT_COLLISION_PAIRS:
+            return self._collide_few_lasers(lasers, dokill_lasers, dokill_fleet)
+        boxes = lasers.boxes()
+        candidates = np.flatnonzero(self.alive)
+
+        # sweep along x: with the aliens sorted by left edge, the ones overlapping each laser sideways are
+        # one run of the sorted order, those with left edges between the laser's left minus a width and its right
+        left = round_pixels(self.x[candidates])
+        top = round_pixels(self.y[candidates])
+        order = np.argsort(left, kind='stable')
+        starts = np.searchsorted(left[order], boxes[:, 0] - self.width, side='right')
+        counts = np.maximum(np.searchsorted(left[order], boxes[:, 0] + boxes[:, 2], side='left') - starts, 0)
+
+        # every (laser, alien) pair from those runs, then keep the ones that overlap vertically too
+        laser_index = np.repeat(np.arange(len(boxes)), counts)
+        run_offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        alien_index = order[np.repeat(starts, counts) + run_offset]
+        overlap = ((top[alien_index] < boxes[laser_index, 1] + boxes[laser_index, 3])
+            & (top[alien_index] + self.height > boxes[laser_index, 1]))
+        laser_index = laser_index[overlap]
+        alien_index = alien_index[overlap]
+        # most steps nothing is hit, and the rest of the work isn't worth setting up for nothing
+        if not len(laser_index):
+            return {}
+
+        # then pixel masks, only for the few pairs whose rects overlap
+        offsets_x = boxes[laser_index, 0] - left[alien_index]
+        offsets_y = boxes[laser_index, 1] - top[alien_index]
+        touching = np.array([self.mask.overlap(lasers.mask, offset) is not None
+            for offset in zip(offsets_x.tolist(), offsets_y.tolist())], dtype=bool)
+        laser_index = laser_index[touching]
+        alien_index = candidates[alien_index[touching]]
+
+        if dokill_fleet:
+            # an alien is gone after the first laser that hits it, so later lasers can't hit it as well
+            first_laser = np.full(len(self.x), len(boxes))
+            np.minimum.at(first_laser, alien_index, laser_index)
+            first = laser_index == first_laser[alien_index]
+            laser_index, alien_index = laser_index[first], alien_index[first]
+
+        # group the hits by laser, each laser's aliens in fleet order
+        pair_order = np.lexsort((alien_index, laser_index))
+        laser_index, alien_index = laser_index[pair_order], alien_index[pair_order]
+        hit_lasers, group_starts = np.unique(laser_index, return_index=True)
+        collisions = {}
+        for index, aliens in zip(hit_lasers.tolist(), np.split(alien_index, group_starts[1:])):
+            collisions[index] = [self.members[alien] for alien in aliens.tolist()]
+
+        if dokill_fleet:
+            for alien in alien_index.tolist():
+                self.members[alien].kill()
+        if dokill_lasers and collisions:
+            lasers.remove(hit_lasers)
+        return collisions
+
+    def _collide_few_lasers(self, lasers, dokill_lasers, dokill_fleet):
+        '''
+        collide_lasers() for a handful of lasers and aliens, e.g. most frames of a normal game, by testing
+        every pair in turn. At these counts plain Python beats setting up NumPy arrays
+        '''
+        # the aliens still in the group, in fleet order
+        candidates = sorted(alien.index for alien in self.spritedict)
+        fleet_x, fleet_y = self.x.tolist(), self.y.tolist()
+        aliens = [(alien, round_pixel(fleet_x[alien]), round_pixel(fleet_y[alien])) for alien in candidates]
+        width, height = lasers.width, lasers.height
+        killed = set()
+        collisions = {}
+        count = len(lasers)
+        for index, (x, y) in enumerate(zip(lasers.x[:count].tolist(), lasers.y[:count].tolist())):
+            y = round_pixel(y)
+            hits = [alien for alien, alien_left, alien_top in aliens
+                if alien not in killed
+                and x < alien_left + self.width and x + width > alien_left
+                and y < alien_top + self.height and y + height > alien_top
+                and self.mask.overlap(lasers.mask, (x - alien_left, y - alien_top)) is not None]
+            if hits:
+                collisions[index] = [self.members[alien] for alien in hits]
+                if dokill_fleet:
+                    killed.update(hits)
+
+        for alien in killed:
+            self.members[alien].kill()
+        if dokill_lasers and collisions:
+            lasers.remove(list(collisions))
+        return collisions
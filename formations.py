@@ -0,0 +1,53 @@
+'''
+Fleet formations. A formation works out where every alien of a fleet starts for a given screen and alien size.
+Layouts are computed once per (formation, screen size, alien size) and cached, so building a fleet for a new
+level, after a hit or on Play doesn't redo the math
+'''
+from functools import lru_cache
+
+import numpy as np
+
+def grid(screen_width, screen_height, alien_width, alien_height):
+    '''
+    Rows of aliens with one alien width between them and one alien height between rows,
+    leaving room at the sides and above the ship
+    '''
+    xs = np.arange(alien_width, screen_width - 2 * alien_width, 2 * alien_width)
+    ys = np.arange(alien_height, screen_height - 3 * alien_height, 2 * alien_height)
+    # row by row, left to right
+    return np.column_stack((np.tile(xs, len(ys)), np.repeat(ys, len(xs))))
+
+def checkerboard(screen_width, screen_height, alien_width, alien_height):
+    '''
+    Like grid, but every other row is shifted half a gap to the right
+    '''
+    positions = grid(screen_width, screen_height, alien_width, alien_height)
+    rows = (positions[:, 1] - alien_height) // (2 * alien_height)
+    positions[:, 0] += (rows % 2) * (alien_width // 2)
+    return positions
+
+def wedge(screen_width, screen_height, alien_width, alien_height):
+    '''
+    Like grid, but each row lower down loses an alien at both ends, tapering the fleet towards the ship
+    '''
+    positions = grid(screen_width, screen_height, alien_width, alien_height)
+    rows = (positions[:, 1] - alien_height) // (2 * alien_height)
+    columns = (positions[:, 0] - alien_width) // (2 * alien_width)
+    last_column = columns.max() if len(columns) else 0
+    return positions[(columns >= rows) & (columns <= last_column - rows)]
+
+# formation name -> function, add to this to make a new formation available to Settings.fleet_formation
+FORMATIONS = {
+    'grid': grid,
+    'checkerboard': checkerboard,
+    'wedge': wedge,
+}
+
+@lru_cache(maxsize=32)
+def fleet_layout(formation, screen_width, screen_height, alien_width, alien_height):
+    '''
+    Return the (x, y) starting positions of every alien in formation, as a read-only array shared by all callers
+    '''
+    positions = FORMATIONS[formation](screen_width, screen_height, alien_width, alien_height).astype(float)
+    positions.flags.writeable = False
+    return positions
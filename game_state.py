@@ -0,0 +1,40 @@
+MENU = 'menu'
+PLAYING = 'playing'
+RESPAWNING = 'respawning'
+GAME_OVER = 'game_over'
+
+class GameState:
+    '''
+    A class to track which state the game is in. Timed states, like the pause after the ship is hit,
+    count down on the game's own clock as frames are simulated, so nothing ever sleeps and the event
+    loop and drawing keep running through them
+    '''
+    def __init__(self, current=MENU):
+        '''
+        Initialize the state machine in the current state
+        '''
+        self.current = current
+        # seconds left in a timed state, and the state to move on to when they run out
+        self.time_left = None
+        self.next = None
+        # counts every change, so anything cached for one stretch of a state can tell when it is stale
+        self.changes = 0
+
+    def change(self, state, duration=None, then=None):
+        '''
+        Switch to state. With a duration, move on to then after that many seconds of game time
+        '''
+        self.current = state
+        self.time_left = duration
+        self.next = then
+        self.changes += 1
+
+    def update(self, dt):
+        '''
+        Count down a timed state by dt seconds, and move on once its time is up
+        '''
+        if self.time_left is None:
+            return
+        self.time_left -= dt
+        if self.time_left <= 0:
+            self.change(self.next)
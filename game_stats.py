@@ -1,17 +1,38 @@
-import pygame
+def _stat(name):
+    '''
+    A statistic that tells GameStats' listeners whenever its value changes
+    '''
+    def get(self):
+        return self._values[name]
+
+    def set(self, value):
+        if self._values.get(name) != value:
+            self._values[name] = value
+            for listener in self.listeners:
+                listener(name, value)
+
+    return property(get, set)
 
 class GameStats:
     '''
-    Track statistics for Alien Invasion
+    Track statistics for Alien Invasion. Anything that shows a stat can add a listener(name, value)
+    to listeners and it will be called on every change, instead of polling the stats each frame
     '''
+    score = _stat('score')
+    high_score = _stat('high_score')
+    level = _stat('level')
+    ships_left = _stat('ships_left')
+
     def __init__(self, ai_game):
         '''
         Initialize statistics
         '''
         self.settings = ai_game.settings
+        self._values = {}
+        self.listeners = []
         self.reset_stats()
-        # high score should never be reset
-        self.high_score = 0
+        # high score should never be reset, and carries over from earlier launches
+        self.high_score = ai_game.high_scores.best()
         self.level = 1
 
     def reset_stats(self):
@@ -0,0 +1,52 @@
+import argparse
+import importlib
+from time import perf_counter
+
+from alien_invasion import AlienInvasion
+
+def load_policy(spec):
+    '''
+    Import a policy given as 'module:function'
+    '''
+    module_name, _, function_name = spec.partition(':')
+    return getattr(importlib.import_module(module_name), function_name)
+
+def run_headless(max_frames=100_000, dt=None, ai_game=None, policy=None):
+    '''
+    Play one game with no window and no frame rate cap, as fast as the CPU allows, in steps of dt
+    simulated seconds (the game's fixed physics step unless given).
+    policy(ai_game) is asked for a (move, fire) action every frame, see policies.py.
+    Stops when the game is over or after max_frames, and returns a report of the run
+    '''
+    if ai_game is None:
+        ai_game = AlienInvasion(headless=True)
+    ai_game._start_game()
+
+    start = perf_counter()
+    while ai_game.game_active and ai_game.frame < max_frames:
+        if policy:
+            ai_game._apply_action(*policy(ai_game))
+        ai_game._step(dt)
+    wall_time = perf_counter() - start
+
+    return {
+        'frames': ai_game.frame,
+        'sim_time': ai_game.sim_time,
+        'wall_time': wall_time,
+        # how many simulated frames we get through per real second
+        'frames_per_second': ai_game.frame / wall_time if wall_time else float('inf'),
+        'score': ai_game.stats.score,
+        'level': ai_game.stats.level,
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run Alien Invasion headless at a fixed timestep")
+    parser.add_argument('--frames', type=int, default=100_000, help="stop after this many frames")
+    parser.add_argument('--dt', type=float, help="simulated seconds per frame, defaults to the physics step")
+    parser.add_argument('--policy', default='policies:sweep', help="module:function that plays the game")
+    args = parser.parse_args()
+
+    report = run_headless(args.frames, args.dt, policy=load_policy(args.policy))
+    print(f"{report['frames']} frames ({report['sim_time']:.1f}s simulated) in {report['wall_time']:.2f}s wall time")
+    print(f"{report['frames_per_second']:,.0f} simulated frames per second")
+    print(f"score {report['score']:,}, level {report['level']}")
@@ -0,0 +1,138 @@
+import atexit
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+class HighScoreStore:
+    '''
+    A class to keep the high score on disk between launches. The file is an append-only log with one
+    score per line, read only when the high score is first asked for. New high scores are handed to a
+    background writer thread, which writes the latest one every so often, so the game never waits on the disk.
+    With no path the store only keeps the high score in memory, e.g. for headless games
+    '''
+    def __init__(self, path, flush_interval=1.0, compact_after=100):
+        '''
+        Initialize the store for the log at path, writing at most once every flush_interval seconds
+        '''
+        self.path = path
+        self.flush_interval = flush_interval
+        # rewrite the log as a single line once it has this many
+        self.compact_after = compact_after
+
+        self.best_score = None
+        self.written_score = 0
+        self.lines = 0
+        # set when the log ends in a torn line, so the next write starts the log over instead of appending to it
+        self.torn = False
+
+        # the newest score waiting to be written, shared with the writer thread
+        self.pending = None
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.writer = None
+
+    def best(self):
+        '''
+        Return the best score ever recorded, reading the log the first time
+        '''
+        if self.best_score is None:
+            self.best_score = self._read()
+            self.written_score = self.best_score
+        return self.best_score
+
+    def _read(self):
+        if self.path is None or not os.path.exists(self.path):
+            return 0
+        best = 0
+        with open(self.path) as log:
+            for line in log:
+                self.lines += 1
+                # a crash mid-write can leave a torn last line, skip anything that isn't a whole score
+                if not line.endswith('\n'):
+                    self.torn = True
+                elif line.strip().isdigit():
+                    best = max(best, int(line))
+        return best
+
+    def submit(self, score):
+        '''
+        Record a new high score. Returns right away, the write happens on the writer thread
+        '''
+        if score <= self.best():
+            return
+        self.best_score = score
+        if self.path is None:
+            return
+        with self.lock:
+            self.pending = score
+        if self.writer is None:
+            self.stopping.clear()
+            self.writer = threading.Thread(target=self._run, name='high-score-writer', daemon=True)
+            self.writer.start()
+            # make sure the last score gets written however the game exits
+            atexit.register(self.close)
+        self.wake.set()
+
+    def _run(self):
+        '''
+        Writer thread: wait for a new score, give the game a moment to beat it again, then write only the latest
+        '''
+        while True:
+            self.wake.wait()
+            # scores usually come in bursts as aliens die, so wait and write just the last of them
+            if self.stopping.wait(self.flush_interval):
+                break
+            self.wake.clear()
+            self._write_pending()
+
+    def _write_pending(self):
+        with self.lock:
+            score, self.pending = self.pending, None
+        if score is None or score <= self.written_score:
+            return
+        try:
+            # a score appended after a torn line would be glued onto it, rewrite the log instead
+            if self.torn or self.lines >= self.compact_after:
+                self._compact(score)
+            else:
+                with open(self.path, 'a') as log:
+                    log.write(f"{score}\n")
+                    log.flush()
+                    os.fsync(log.fileno())
+                self.lines += 1
+        except OSError as error:
+            # e.g. a full disk: the game carries on with the score in memory. The write may have left part of a
+            # line behind, so the next one starts the log over
+            self.torn = True
+            logger.warning("couldn't save the high score to %s: %s", self.path, error)
+            return
+        self.written_score = score
+
+    def _compact(self, score):
+        '''
+        Replace the log with a single line. The new file is written aside and swapped in,
+        so a crash leaves either the old log or the new one, never half of one
+        '''
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as log:
+            log.write(f"{score}\n")
+            log.flush()
+            os.fsync(log.fileno())
+        os.replace(temp_path, self.path)
+        self.lines = 1
+        self.torn = False
+
+    def close(self):
+        '''
+        Stop the writer thread and write anything still pending
+        '''
+        if self.writer is None:
+            return
+        self.stopping.set()
+        self.wake.set()
+        self.writer.join()
+        self.writer = None
+        self._write_pending()
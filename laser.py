@@ -1,37 +1,129 @@
+import numpy as np
 import pygame
-from pygame.sprite import Sprite
 
-class Laser(Sprite):
+from pixels import round_pixels
+
+class Lasers:
     '''
-    A class to manage lasers fired from the ship
+    A class to manage the lasers fired from the ship. Lasers are kept in NumPy arrays rather than as sprites,
+    the live ones packed at the front in the order they were fired, so moving them, dropping the ones that
+    left the screen and drawing them are a few array operations however many there are
     '''
-    def __init__(self, ai_game):
+    def __init__(self, ai_game, capacity=16):
         '''
-        Create a laser object at the ship's current position
+        Initialize room for capacity lasers, more is made as needed
         '''
-        super().__init__()
-        self.screen = ai_game.screen
+        self.ai_game = ai_game
         self.settings = ai_game.settings
-        self.color = self.settings.laser_color
+        self.width = self.settings.laser_width
+        self.height = self.settings.laser_height
+
+        # every laser looks the same, so they're all drawn from one small surface filled with the laser color
+        self.image = pygame.Surface((self.width, self.height)).convert()
+        self.image.fill(self.settings.laser_color)
+        # a laser is solid all over, so its collision mask is full
+        self.mask = pygame.Mask((self.width, self.height), fill=True)
+
+        # one entry per laser: left edge, exact vertical position, and where it was before the last update
+        self.x = np.zeros(capacity, dtype=int)
+        self.y = np.zeros(capacity)
+        self.prev_y = np.zeros(capacity)
+        # the first count entries are the lasers in flight
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def fire(self):
+        '''
+        Add a laser at the ship's current position
+        '''
+        if self.count == len(self.x):
+            self._grow()
+        rect = pygame.Rect(0, 0, self.width, self.height)
+        rect.midtop = self.ai_game.ship.rect.midtop
+        self.x[self.count] = rect.x
+        self.y[self.count] = self.prev_y[self.count] = rect.y
+        self.count += 1
+
+    def build(self, positions):
+        '''
+        Replace the lasers with one at each (x, y) position
+        '''
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        self.count = 0
+        while len(self.x) < len(positions):
+            self._grow()
+        self.count = len(positions)
+        self.x[:self.count] = positions[:, 0]
+        self.y[:self.count] = self.prev_y[:self.count] = positions[:, 1]
+
+    def _grow(self):
+        '''
+        Double the room for lasers, keeping the ones in flight
+        '''
+        capacity = max(2 * len(self.x), 1)
+        for name in ('x', 'y', 'prev_y'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
 
-        # create a laser rect at 0,0 and then set the correct position
-        self.rect = pygame.Rect(0, 0, self.settings.laser_width, self.settings.laser_height)
-        self.rect.midtop = ai_game.ship.rect.midtop
+    def empty(self):
+        '''
+        Remove every laser
+        '''
+        self.count = 0
 
-        # store the laser's position as a float
-        self.y = float(self.rect.y)
+    def remove(self, indices):
+        '''
+        Remove the lasers at indices
+        '''
+        keep = np.ones(self.count, dtype=bool)
+        keep[indices] = False
+        self._keep(keep)
+
+    def _keep(self, keep):
+        '''
+        Pack the lasers where keep is True at the front, in the order they were fired
+        '''
+        count = np.count_nonzero(keep)
+        self.x[:count] = self.x[:self.count][keep]
+        self.y[:count] = self.y[:self.count][keep]
+        self.prev_y[:count] = self.prev_y[:self.count][keep]
+        self.count = count
+
+    def update(self, dt):
+        '''
+        Move every laser up the screen for dt seconds, and drop the ones that have passed the top
+        '''
+        y = self.y[:self.count]
+        self.prev_y[:self.count] = y
+        y -= self.settings.laser_speed * dt
+        on_screen = round_pixels(y) + self.height > 0
+        if not on_screen.all():
+            self._keep(on_screen)
+
+    def boxes(self):
+        '''
+        Return an array with the (x, y, width, height) of every laser, in the order they were fired
+        '''
+        count = self.count
+        return np.column_stack((self.x[:count], round_pixels(self.y[:count]),
+            np.full(count, self.width), np.full(count, self.height)))
 
-    def update(self):
+    def rects(self):
         '''
-        Move the laser on the screen
+        Return the (x, y, width, height) of every laser as lists, in the order they were fired
         '''
-        # update the exact position of the laser
-        self.y -= self.settings.laser_speed
-        # update the rect position
-        self.rect.y = self.y
+        return self.boxes().tolist()
 
-    def draw_laser(self):
+    def draw(self, renderer, alpha=1.0):
         '''
-        Draw the laser to the screen
+        Queue every laser for drawing in one batch, alpha of the way from their previous positions to their current ones
         '''
-        pygame.draw.rect(self.screen, self.color, self.rect)
+        count = self.count
+        y = self.prev_y[:count] + (self.y[:count] - self.prev_y[:count]) * alpha
+        rects = np.column_stack((self.x[:count], round_pixels(y),
+            np.full(count, self.width), np.full(count, self.height))).tolist()
+        renderer.queue_many(self.image, rects)
@@ -0,0 +1,17 @@
+import math
+
+import numpy as np
+
+def round_pixels(values):
+    '''
+    Round positions to whole pixels the way pygame does when a float is assigned to a Rect, halves away
+    from zero. Takes a single position or an array of them, so arrays land where a Rect would put them
+    '''
+    return (np.sign(values) * np.floor(np.abs(values) + .5)).astype(int)
+
+def round_pixel(value):
+    '''
+    round_pixels() for one plain number, without the cost of going through NumPy
+    '''
+    rounded = int(math.floor(abs(value) + .5))
+    return rounded if value >= 0 else -rounded
@@ -0,0 +1,47 @@
+'''
+Simple policies for playing the game without a keyboard. A policy is called with the game once per frame
+and returns a (move, fire) action: move is -1 for left, 1 for right or 0 to stay put, fire is True to shoot.
+The game itself has no randomness, policies that want some use the random module, seeded by whoever runs them
+'''
+import random
+
+def idle(ai_game):
+    '''
+    Never move and never fire
+    '''
+    return 0, False
+
+def sweep(ai_game):
+    '''
+    Sweep from edge to edge, firing whenever possible
+    '''
+    ship = ai_game.ship
+    if ship.rect.left <= 0:
+        return 1, True
+    if ship.rect.right >= ship.screen_rect.right:
+        return -1, True
+    # keep going the way the ship is already moving
+    return (-1 if ship.moving_left else 1), True
+
+def track(ai_game):
+    '''
+    Chase the lowest alien and fire when lined up under it
+    '''
+    fleet = ai_game.aliens
+    if not fleet:
+        return 0, False
+    lowest = max(fleet, key=lambda alien: (alien.y, -alien.x))
+    target = lowest.rect.centerx
+    ship_x = ai_game.ship.rect.centerx
+    if abs(target - ship_x) < fleet.width // 2:
+        return 0, True
+    return (1 if target > ship_x else -1), False
+
+def jittery(ai_game):
+    '''
+    Sweep like sweep(), but now and then turn around early or hold fire, so games from different seeds differ
+    '''
+    move, fire = sweep(ai_game)
+    if random.random() < .02:
+        move = -move
+    return move, fire and random.random() < .8
@@ -0,0 +1,149 @@
+import csv
+import json
+from array import array
+from time import perf_counter
+
+# the phases of a frame, in the order they run
+PHASES = ('events', 'ship', 'lasers', 'collisions', 'aliens', 'draw', 'present', 'wait')
+EVENTS, SHIP, LASERS, COLLISIONS, ALIENS, DRAW, PRESENT, WAIT = range(len(PHASES))
+
+class NullProfiler:
+    '''
+    Stands in for FrameProfiler when profiling is off, so the main loop doesn't need any checks
+    '''
+    enabled = False
+
+    def begin_frame(self):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def draw_overlay(self):
+        pass
+
+class FrameProfiler:
+    '''
+    A class to time each phase of every frame into a ring buffer holding the most recent frames
+    '''
+    enabled = True
+
+    def __init__(self, ai_game, capacity=3600, overlay=True):
+        '''
+        Initialize the ring buffer for capacity frames
+        '''
+        self.ai_game = ai_game
+        self.capacity = capacity
+        self.overlay = overlay
+
+        # one row of len(PHASES) timings per frame, stored flat
+        self.timings = array('d', [0.0]) * (capacity * len(PHASES))
+        self.frames = array('q', [0]) * capacity
+        self.next_row = 0
+        self.count = 0
+        # frames finished since profiling started, unlike count this keeps going once the buffer is full
+        self.frames_timed = 0
+        self._row_start = 0
+        self._last = 0.0
+
+        # the overlay text is only re-rendered every so often, so it doesn't cost a font render per frame
+        self.overlay_interval = 30
+        self.overlay_image = None
+
+    def begin_frame(self):
+        '''
+        Start timing a new frame
+        '''
+        self._row_start = self.next_row * len(PHASES)
+        self.frames[self.next_row] = self.ai_game.frame
+        self._last = perf_counter()
+
+    def mark(self, phase):
+        '''
+        Charge the time since the last mark to phase. A phase can run more than once a frame, e.g. several
+        physics steps, and its times add up
+        '''
+        now = perf_counter()
+        self.timings[self._row_start + phase] += now - self._last
+        self._last = now
+
+    def end_frame(self):
+        '''
+        Finish the frame and move on to the next row of the ring buffer
+        '''
+        self.next_row = (self.next_row + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.frames_timed += 1
+        # clear the next row, phases that don't run in a frame (e.g. drawing when headless) stay at zero
+        start = self.next_row * len(PHASES)
+        self.timings[start:start + len(PHASES)] = array('d', [0.0]) * len(PHASES)
+
+    def rows(self):
+        '''
+        Return (frame, phase timings) for the recorded frames, oldest first
+        '''
+        first = (self.next_row - self.count) % self.capacity
+        rows = []
+        for offset in range(self.count):
+            row = (first + offset) % self.capacity
+            start = row * len(PHASES)
+            rows.append((self.frames[row], list(self.timings[start:start + len(PHASES)])))
+        return rows
+
+    def summary(self):
+        '''
+        Return FPS and p50/p99 frame times over the recorded frames. Frame time is the work done in a frame,
+        without the time spent waiting for the frame rate cap
+        '''
+        rows = self.rows()
+        if not rows:
+            return {'frames': 0, 'fps': 0.0, 'p50_ms': 0.0, 'p99_ms': 0.0}
+        frame_times = sorted(sum(timings) - timings[WAIT] for _, timings in rows)
+        total = sum(sum(timings) for _, timings in rows)
+        summary = {
+            'frames': len(rows),
+            'fps': len(rows) / total if total else 0.0,
+            'p50_ms': frame_times[len(frame_times) // 2] * 1000,
+            'p99_ms': frame_times[int(len(frame_times) * .99)] * 1000,
+        }
+        for phase, name in enumerate(PHASES):
+            summary[f'{name}_ms'] = sum(timings[phase] for _, timings in rows) / len(rows) * 1000
+        return summary
+
+    def draw_overlay(self):
+        '''
+        Queue an FPS and frame time readout in the bottom left corner of the screen
+        '''
+        if not self.overlay:
+            return
+        # counted in drawn frames, the game's own frame counter counts physics steps, several or none per frame
+        if self.overlay_image is None or self.frames_timed % self.overlay_interval == 0:
+            summary = self.summary()
+            text = f"{summary['fps']:.0f} fps  p50 {summary['p50_ms']:.2f}ms  p99 {summary['p99_ms']:.2f}ms"
+            font = self.ai_game.fonts.get(None, 24)
+            self.overlay_image = font.render(text, True, (30, 30, 30), self.ai_game.settings.bg_color)
+        rect = self.overlay_image.get_rect()
+        rect.bottomleft = (10, self.ai_game.settings.screen_height - 10)
+        self.ai_game.renderer.queue(self.overlay_image, rect)
+
+    def dump(self, path):
+        '''
+        Write the recorded frames to path, as JSON if it ends in .json and as CSV otherwise
+        '''
+        if path.endswith('.json'):
+            data = {
+                'summary': self.summary(),
+                'phases': PHASES,
+                'frames': [{'frame': frame, **dict(zip(PHASES, timings))} for frame, timings in self.rows()],
+            }
+            with open(path, 'w') as dump:
+                json.dump(data, dump, indent=1)
+        else:
+            with open(path, 'w', newline='') as dump:
+                writer = csv.writer(dump)
+                writer.writerow(('frame',) + PHASES)
+                for frame, timings in self.rows():
+                    writer.writerow([frame] + timings)
@@ -0,0 +1,144 @@
+from collections import Counter
+
+import pygame
+
+from profiler import DRAW, PRESENT
+
+# past this many dirty rects, redrawing the whole screen is cheaper than patching it
+DIRTY_RECT_LIMIT = 120
+
+class Renderer:
+    '''
+    A class to draw frames by only redrawing the parts of the screen that changed.
+    Everything that draws queues (source, rect) items here during a frame, where source is a surface to
+    blit or a color to fill. present() compares the frame with the last one, repaints only the regions where
+    items appeared, moved or disappeared, and hands just those rects to pygame.display.update()
+    '''
+    def __init__(self, ai_game):
+        '''
+        Initialize the renderer and the background used to erase old items
+        '''
+        self.ai_game = ai_game
+        self.screen_rect = ai_game.screen_rect
+        self.settings = ai_game.settings
+        self.profiler = ai_game.profiler
+        # headless games draw off screen, there's no window to show the frames in
+        self.show = not ai_game.headless
+
+        # the screen and the background are only fetched when the first frame is drawn, so a game that never
+        # draws never allocates them
+        self.screen = None
+        self.background = None
+
+        # the items queued this frame, and the ones drawn last frame
+        self.items = []
+        self.last_items = []
+        self.full_redraw = True
+
+    def queue(self, source, rect):
+        '''
+        Queue a surface to blit, or a color to fill, at rect for this frame
+        '''
+        self.items.append((source, tuple(rect)))
+
+    def queue_many(self, source, rects):
+        '''
+        Queue the same surface or color at each of rects, e.g. for a whole fleet
+        '''
+        self.items.extend([(source, tuple(rect)) for rect in rects])
+
+    def invalidate(self):
+        '''
+        Redraw the whole screen next frame, e.g. after a surface was changed in place
+        '''
+        self.full_redraw = True
+
+    def present(self):
+        '''
+        Draw the queued frame and show it. Returns False if nothing changed and nothing was presented
+        '''
+        items, self.items = self.items, []
+        if self.screen is None:
+            self._allocate()
+        if not self.full_redraw and items == self.last_items:
+            self.profiler.mark(DRAW)
+            return False
+
+        if self.full_redraw:
+            dirty = None
+        else:
+            # items that are gone or moved leave a hole, items that are new or moved need drawing
+            last, current = Counter(self.last_items), Counter(items)
+            changed = list((last - current).elements()) + list((current - last).elements())
+            # clip to the screen, blitting the background from an area partly off screen would misalign it
+            dirty = [self.screen_rect.clip(rect) for _, rect in changed]
+            dirty = [rect for rect in dirty if rect]
+            if len(dirty) > DIRTY_RECT_LIMIT:
+                dirty = None
+        self.last_items = items
+        self.full_redraw = False
+
+        if dirty is None:
+            self.screen.blit(self.background, (0, 0))
+            self._draw_many(self.screen, items)
+            self.profiler.mark(DRAW)
+            if self.show:
+                pygame.display.flip()
+        else:
+            self._repaint(items, dirty)
+            self.profiler.mark(DRAW)
+            if self.show:
+                pygame.display.update(dirty)
+        self.profiler.mark(PRESENT)
+        return True
+
+    def _allocate(self):
+        self.screen = self.ai_game.screen
+        self.background = pygame.Surface(self.screen_rect.size).convert()
+        self.background.fill(self.settings.bg_color)
+
+    def _repaint(self, items, dirty):
+        '''
+        Repaint each dirty rect: background first, then every item that overlaps it, clipped to the rect
+        '''
+        rects = [rect for _, rect in items]
+        for dirty_rect in dirty:
+            self.screen.set_clip(dirty_rect)
+            self.screen.blit(self.background, dirty_rect, dirty_rect)
+            self._draw_many(self.screen, [items[index] for index in dirty_rect.collidelistall(rects)])
+        self.screen.set_clip(None)
+
+    def flatten(self):
+        '''
+        Draw everything queued so far onto a copy of the background, and queue that one surface in its place.
+        Returns the surface, which can be queued again instead of its items for as long as they don't change
+        '''
+        if self.screen is None:
+            self._allocate()
+        scene = self.background.copy()
+        self._draw_many(scene, self.items)
+        self.items = [(scene, tuple(self.screen_rect))]
+        return scene
+
+    def _draw_many(self, target, items):
+        '''
+        Draw items onto target in order. Runs of surfaces, e.g. a fleet or the lasers, go in a single blits() call
+        '''
+        batch = []
+        for source, rect in items:
+            if isinstance(source, pygame.Surface):
+                batch.append((source, rect))
+                continue
+            if batch:
+                target.blits(batch, doreturn=False)
+                batch = []
+            self._draw(target, source, rect)
+        if batch:
+            target.blits(batch, doreturn=False)
+
+    def _draw(self, target, source, rect):
+        if isinstance(source, pygame.Surface):
+            target.blit(source, rect)
+        else:
+            # fill() shifts rects that start above the screen down onto it, so clip them first
+            target.fill(source, self.screen_rect.clip(rect))
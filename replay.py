@@ -0,0 +1,143 @@
+import argparse
+import csv
+import struct
+from time import perf_counter
+
+import pygame
+
+from alien_invasion import AlienInvasion
+
+# file header: magic and format version
+HEADER = struct.Struct('<4sH')
+MAGIC = b'AILG'
+VERSION = 1
+
+# one record per input event: frame number, record kind, key or mouse button, mouse x, mouse y
+RECORD = struct.Struct('<IBihh')
+END, KEYDOWN, KEYUP, MOUSEBUTTONDOWN, QUIT = range(5)
+
+EVENT_KINDS = {
+    pygame.KEYDOWN: KEYDOWN,
+    pygame.KEYUP: KEYUP,
+    pygame.MOUSEBUTTONDOWN: MOUSEBUTTONDOWN,
+    pygame.QUIT: QUIT,
+}
+
+class InputRecorder:
+    '''
+    A class to write the input events of a session to a compact binary log, tagged with the frame they arrived on
+    '''
+    def __init__(self, path):
+        '''
+        Open the log file and write its header
+        '''
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION))
+        self.last_frame = 0
+
+    def record(self, frame, event):
+        '''
+        Log event as arriving on frame. Events the game doesn't react to are skipped
+        '''
+        kind = EVENT_KINDS.get(event.type)
+        if kind is None:
+            return
+        code, x, y = 0, 0, 0
+        if kind in (KEYDOWN, KEYUP):
+            code = event.key
+        elif kind == MOUSEBUTTONDOWN:
+            code = event.button
+            x, y = event.pos
+        self.file.write(RECORD.pack(frame, kind, code, x, y))
+        self.last_frame = frame
+
+    def close(self, frame=None):
+        '''
+        Write the end marker, so a replay runs for as many frames as the session did, and close the log
+        '''
+        if self.file.closed:
+            return
+        self.file.write(RECORD.pack(self.last_frame if frame is None else frame, END, 0, 0, 0))
+        self.file.close()
+
+def read_log(path):
+    '''
+    Read an input log in one go. Returns the events grouped by frame and the frame the session ended on
+    '''
+    with open(path, 'rb') as log:
+        data = log.read()
+    magic, version = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} input log")
+
+    events = {}
+    end_frame = 0
+    for frame, kind, code, x, y in RECORD.iter_unpack(data[HEADER.size:]):
+        if kind == END:
+            end_frame = frame
+            break
+        # without an end marker, e.g. after a crash, replay up to and including the last event
+        end_frame = max(end_frame, frame + 1)
+        if kind in (KEYDOWN, KEYUP):
+            event_type = pygame.KEYDOWN if kind == KEYDOWN else pygame.KEYUP
+            event = pygame.event.Event(event_type, key=code)
+        elif kind == MOUSEBUTTONDOWN:
+            event = pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=code, pos=(x, y))
+        else:
+            event = pygame.event.Event(pygame.QUIT)
+        events.setdefault(frame, []).append(event)
+    return events, end_frame
+
+def replay(path, ai_game=None, render=False):
+    '''
+    Feed a recorded session back through the game's event handlers frame by frame, as fast as possible.
+    Returns the time each frame took, in seconds
+    '''
+    if ai_game is None:
+        ai_game = AlienInvasion(headless=True)
+    events, end_frame = read_log(path)
+
+    frame_times = []
+    while ai_game.frame < end_frame:
+        start = perf_counter()
+        frame_events = events.get(ai_game.frame, ())
+        # stop where the session ended, without handling the quit itself
+        if any(event.type == pygame.QUIT or ai_game.controls.quits(event) for event in frame_events):
+            break
+        for event in frame_events:
+            ai_game._handle_event(event)
+        ai_game._step()
+        if render:
+            ai_game._update_screen()
+        frame_times.append(perf_counter() - start)
+    return frame_times
+
+def write_timings(path, frame_times):
+    '''
+    Write the per-frame timings to a CSV file
+    '''
+    with open(path, 'w', newline='') as timings:
+        writer = csv.writer(timings)
+        writer.writerow(['frame', 'seconds'])
+        writer.writerows(enumerate(frame_times))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a recorded Alien Invasion session at unlimited speed")
+    parser.add_argument('log', help="input log written by alien_invasion.py --record")
+    parser.add_argument('--render', action='store_true', help="draw every frame too")
+    parser.add_argument('--timings', help="write per-frame timings to this CSV file")
+    args = parser.parse_args()
+
+    ai = AlienInvasion(headless=True)
+    frame_times = replay(args.log, ai, args.render)
+    if args.timings:
+        write_timings(args.timings, frame_times)
+    if not frame_times:
+        parser.exit(message="nothing to replay\n")
+
+    ordered = sorted(frame_times)
+    total = sum(frame_times)
+    print(f"{len(frame_times)} frames in {total:.3f}s ({len(frame_times) / total:,.0f} frames per second)")
+    print(f"per frame: p50 {ordered[len(ordered) // 2] * 1000:.3f}ms, "
+          f"p99 {ordered[int(len(ordered) * .99)] * 1000:.3f}ms, max {ordered[-1] * 1000:.3f}ms")
+    print(f"final score {ai.stats.score:,}, level {ai.stats.level}, ships left {ai.stats.ships_left}")
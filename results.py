@@ -0,0 +1,16 @@
+import csv
+import json
+
+def write_table(path, rows, document):
+    '''
+    Write results to path: document as JSON if path ends in .json, otherwise rows, a list of dicts with the same
+    keys, as CSV with one column per key
+    '''
+    if path.endswith('.json'):
+        with open(path, 'w') as results_file:
+            json.dump(document, results_file, indent=1)
+    else:
+        with open(path, 'w', newline='') as results_file:
+            writer = csv.DictWriter(results_file, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
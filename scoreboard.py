@@ -1,33 +1,47 @@
 import pygame
-from pygame.sprite import Group
 
-import pygame.font
+from ship import ShipLivesRed, ShipLivesGreen
+from text import GlyphAtlas
 
-from ship import Ship, ShipLivesRed, ShipLivesGreen
+# which widgets need preparing again when a stat changes, in the order they have to be prepared
+WIDGETS = ('score', 'high_score', 'level', 'ships_left')
 
 class Scoreboard:
     '''
-    A class to report scoring information
+    A class to report scoring information. The score, high score, level and lives are composited into one
+    cached HUD image, which is only rebuilt when GameStats reports that one of them changed
     '''
     def __init__(self, ai_game):
         '''
         Initialize the score keeping attributes
         '''
         self.ai_game = ai_game
-        self.screen = ai_game.screen
-        self.screen_rect = self.screen.get_rect()
+        self.renderer = ai_game.renderer
+        self.screen_rect = ai_game.screen_rect
         self.settings = ai_game.settings
         self.stats = ai_game.stats
 
         #font settings for for scoring
         self.text_color = (30,30,30)
-        self.font = pygame.font.SysFont(None, 48)
+        self.font = ai_game.fonts.get(None, 48)
+        # scores and levels are only digits and commas, so build them from pre-rendered glyphs
+        self.digits = GlyphAtlas(self.font, self.text_color, self.settings.bg_color)
 
-        #prepare the initial score image
-        self.prep_score()
-        self.prep_high_score()
-        self.prep_level()
-        self.prep_ships()
+        # one icon of each kind, reused for every life slot
+        self.life_icon = ShipLivesGreen(ai_game).scaled_image
+        self.lost_life_icon = ShipLivesRed(ai_game).scaled_image
+
+        # everything starts out needing preparing, after that only stats that change do
+        self.stale = set(WIDGETS)
+        self.stats.listeners.append(self._stat_changed)
+        self.image = None
+        self.rect = None
+
+    def _stat_changed(self, name, value):
+        '''
+        Mark the widget showing stat name for rebuilding the next time the HUD is drawn
+        '''
+        self.stale.add(name)
 
     def prep_high_score(self):
         '''
@@ -35,7 +49,7 @@ class Scoreboard:
         '''
         high_score = round(self.stats.high_score, -1)
         high_score_str = f"{high_score:,}"
-        self.high_score_image = self.font.render(high_score_str, True, self.text_color, self.settings.bg_color)
+        self.high_score_image = self.digits.render(high_score_str)
 
         #Center the high score at the top of the screen
         self.high_score_rect = self.high_score_image.get_rect()
@@ -48,7 +62,7 @@ class Scoreboard:
         '''
         rounded_score = round(self.stats.score, -1)
         score_str = f"{rounded_score:,}" #the :, is a way to format the number to have commas, like 1,000 vs 1000
-        self.score_image = self.font.render(score_str, True, self.text_color, self.settings.bg_color)
+        self.score_image = self.digits.render(score_str)
 
         #display the score at the top right of the screen
         self.score_rect = self.score_image.get_rect()
@@ -60,7 +74,7 @@ class Scoreboard:
         Turn the level into a rendered image
         '''
         level_str = str(self.stats.level)
-        self.level_image = self.font.render(level_str, True, self.text_color, self.settings.bg_color)
+        self.level_image = self.digits.render(level_str)
 
         #Position the level below the score
         self.level_rect = self.level_image.get_rect()
@@ -71,32 +85,46 @@ class Scoreboard:
         '''
         Show how many ships are left
         '''
-        self.ships_lives = [] 
+        self.ships_lives = []
         for ship_number in range(self.settings.ship_limit):
-            if ship_number < self.stats.ships_left:
-                ship_lives = ShipLivesGreen(self.ai_game)
-            else:
-                ship_lives = ShipLivesRed(self.ai_game)
-            ship_lives.rect.x += ship_number * 150
-            self.ships_lives.append(ship_lives) #.add
+            icon = self.life_icon if ship_number < self.stats.ships_left else self.lost_life_icon
+            self.ships_lives.append((icon, icon.get_rect(x=ship_number * 150)))
 
     def check_high_score(self):
         '''
         Check to see if there is a new high score
         '''
         if self.stats.score > self.stats.high_score:
+            # GameStats tells us it changed, the image is rebuilt when the HUD is next drawn
             self.stats.high_score = self.stats.score
-            self.prep_high_score()
-            self.prep_level()
+            # saved to disk in the background, so this is safe to call from the collision code every frame
+            self.ai_game.high_scores.submit(self.stats.high_score)
+
+    def refresh(self):
+        '''
+        Rebuild the stale widgets and composite the whole HUD into one image. Does nothing if no stats changed
+        '''
+        if not self.stale:
+            return
+        prepare = {'score': self.prep_score, 'high_score': self.prep_high_score,
+            'level': self.prep_level, 'ships_left': self.prep_ships}
+        for name in WIDGETS:
+            if name in self.stale:
+                prepare[name]()
+        self.stale.clear()
+
+        widgets = [(self.score_image, self.score_rect), (self.high_score_image, self.high_score_rect),
+            (self.level_image, self.level_rect)] + self.ships_lives
+        self.rect = widgets[0][1].unionall([rect for _, rect in widgets[1:]])
+        self.image = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        for image, rect in widgets:
+            # the widgets don't overlap, so take each pixel as it is, alpha included, instead of blending
+            # it onto the empty HUD image (which would darken the icons' soft edges)
+            self.image.blit(image, rect.move(-self.rect.x, -self.rect.y), special_flags=pygame.BLEND_RGBA_MAX)
 
     def show_score(self):
         '''
-        Draw the scores, level, & ships to the screen
+        Draw the scores, level, & ships to the screen, as a single blit of the cached HUD
         '''
-        self.screen.blit(self.score_image, self.score_rect)
-        self.screen.blit(self.high_score_image, self.high_score_rect)
-        self.screen.blit(self.level_image, self.level_rect)
-        #self.ships_lives.draw(self.screen)
-        for s in self.ships_lives: 
-            s.blitme()
-            #self.screen.blit(s.scaled_image, s.rect)
\ No newline at end of file
+        self.refresh()
+        self.renderer.queue(self.image, self.rect)
\ No newline at end of file
@@ -0,0 +1,320 @@
+'''
+Many headless games hosted in one process, for remote or bot players. A SessionManager ticks every session
+on one asyncio schedule at the physics rate. Input arrives on each session's queue as pygame events, and
+after every tick each session publishes what changed in its game since its client last heard.
+serve() puts a socket in front of it that speaks one JSON object per line, a local stand-in for a real game server
+'''
+import argparse
+import asyncio
+import contextlib
+import copy
+import itertools
+import json
+import math
+import numbers
+import sys
+import traceback
+from time import perf_counter
+
+import numpy as np
+import pygame
+
+from alien_invasion import AlienInvasion
+from pixels import round_pixels
+from settings import Settings
+
+class Session:
+    '''
+    One game in the server, with its queue of input events and the last state sent to its client
+    '''
+    def __init__(self, session_id, settings):
+        '''
+        Initialize a headless game with its own settings
+        '''
+        self.id = session_id
+        self.game = AlienInvasion(headless=True, settings=settings)
+        # pygame events waiting for the next tick
+        self.inputs = asyncio.Queue()
+        # set by every tick and when the session closes, cleared by deltas()
+        self.updated = asyncio.Event()
+        self.closed = False
+        # the state as the client last saw it, nothing to begin with so the first delta is the whole state
+        self.published = {}
+
+    def state(self):
+        '''
+        Return what a client needs to draw the game, as plain numbers and lists
+        '''
+        game = self.game
+        fleet = game.aliens
+        alive = fleet.alive
+        return {
+            'state': game.state.current,
+            'score': game.stats.score,
+            'high_score': game.stats.high_score,
+            'level': game.stats.level,
+            'ships_left': game.stats.ships_left,
+            'ship': game.ship.rect.x,
+            'aliens': round_pixels(np.column_stack((fleet.x[alive], fleet.y[alive]))).tolist(),
+            'lasers': game.lasers.boxes()[:, :2].tolist(),
+        }
+
+    def delta(self):
+        '''
+        Return the parts of the state that changed since the last delta
+        '''
+        state = self.state()
+        changes = {key: value for key, value in state.items() if self.published.get(key) != value}
+        self.published = state
+        return changes
+
+    async def deltas(self):
+        '''
+        Yield what changed after each tick, until the session closes. A client that reads slower than the
+        server ticks gets fewer, bigger deltas rather than a growing backlog. The last one has 'closed' set
+        '''
+        while True:
+            await self.updated.wait()
+            self.updated.clear()
+            changes = self.delta()
+            if self.closed:
+                changes['closed'] = True
+                yield changes
+                return
+            if changes:
+                yield changes
+
+class SessionManager:
+    '''
+    A class to run many sessions on one fixed-rate schedule, tick_rate ticks a second (the physics rate unless
+    given). Every tick hands each session its queued input and advances its game by one physics step
+    '''
+    def __init__(self, settings=None, tick_rate=None):
+        '''
+        Initialize an empty server, whose sessions each start from a deep copy of settings
+        '''
+        self.settings = settings or Settings()
+        self.tick_rate = tick_rate or self.settings.physics_hz
+        self.sessions = {}
+        self._ids = itertools.count(1)
+
+        # seconds spent ticking sessions and how many session ticks that was, see cost_per_session()
+        self.tick_time = 0.0
+        self.session_ticks = 0
+        # ticks that started too late to keep to the schedule
+        self.late_ticks = 0
+
+    def open(self):
+        '''
+        Start a new session at the menu and return it
+        '''
+        session = Session(next(self._ids), copy.deepcopy(self.settings))
+        self.sessions[session.id] = session
+        return session
+
+    def close(self, session):
+        '''
+        End session, its client gets a last delta
+        '''
+        if session.closed:
+            return
+        del self.sessions[session.id]
+        session.closed = True
+        session.updated.set()
+        session.game.high_scores.close()
+
+    def tick(self):
+        '''
+        Advance every session by one physics step, after handling the input it was sent since the last tick
+        '''
+        start = perf_counter()
+        for session in list(self.sessions.values()):
+            game = session.game
+            try:
+                while not session.inputs.empty():
+                    game._handle_event(session.inputs.get_nowait())
+                if game.running:
+                    game._step()
+            except Exception:
+                # one broken game is dropped, the rest of the sessions carry on
+                traceback.print_exc()
+                game.quit()
+            if not game.running:
+                self.close(session)
+                continue
+            session.updated.set()
+            self.session_ticks += 1
+        self.tick_time += perf_counter() - start
+
+    async def run(self):
+        '''
+        Tick forever, tick_rate times a second. Sleeping between ticks lets clients send input and read deltas
+        '''
+        loop = asyncio.get_running_loop()
+        period = 1 / self.tick_rate
+        deadline = loop.time()
+        while True:
+            self.tick()
+            deadline += period
+            delay = deadline - loop.time()
+            if delay < 0:
+                # too many sessions for one core: skip the missed ticks rather than run them back to back
+                self.late_ticks += 1
+                deadline = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    def cost_per_session(self):
+        '''
+        Average seconds one session's tick has taken so far
+        '''
+        return self.tick_time / self.session_ticks if self.session_ticks else 0.0
+
+    def capacity(self):
+        '''
+        How many sessions one core could tick at tick_rate, going by the cost so far
+        '''
+        cost = self.cost_per_session()
+        return int(1 / (cost * self.tick_rate)) if cost else None
+
+def _is_coordinate(value):
+    # a number pygame can take as a pixel position, not a bool, infinity or something too big for a Rect
+    return (isinstance(value, numbers.Real) and not isinstance(value, bool) and math.isfinite(value)
+        and abs(value) < 2 ** 31)
+
+def parse_input(message, game):
+    '''
+    Turn a message from a client into a pygame event for game. Messages are
+    {"type": "keydown" or "keyup", "key": pygame key name}, {"type": "click", "pos": [x, y]}
+    (the Play button if pos is left out) and {"type": "quit"}
+    '''
+    if not isinstance(message, dict):
+        raise ValueError("input must be a JSON object")
+    kind = message.get('type')
+    if kind in ('keydown', 'keyup'):
+        event_type = pygame.KEYDOWN if kind == 'keydown' else pygame.KEYUP
+        return pygame.event.Event(event_type, key=pygame.key.key_code(str(message.get('key'))))
+    if kind == 'click':
+        position = message.get('pos')
+        if position is None:
+            position = game.play_button.rect.center
+        elif not (isinstance(position, list) and len(position) == 2 and all(map(_is_coordinate, position))):
+            raise ValueError("pos must be [x, y] in pixels")
+        return pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=tuple(int(value) for value in position))
+    if kind == 'quit':
+        return pygame.event.Event(pygame.QUIT)
+    raise ValueError(f"unknown input type {kind!r}")
+
+def _encode(message):
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+async def handle_client(manager, reader, writer):
+    '''
+    Give a connection its own session: input lines go on the session's queue, deltas go back as lines
+    '''
+    session = manager.open()
+
+    async def publish():
+        with contextlib.suppress(ConnectionError):
+            async for changes in session.deltas():
+                writer.write(_encode(changes))
+                await writer.drain()
+        # closing the connection also ends the read loop below
+        writer.close()
+
+    publisher = asyncio.create_task(publish())
+    try:
+        while not session.closed:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                session.inputs.put_nowait(parse_input(json.loads(line), session.game))
+            except ValueError as error:
+                writer.write(_encode({'error': str(error)}))
+    except ConnectionError:
+        pass
+    finally:
+        manager.close(session)
+        await publisher
+
+async def serve(manager, host='127.0.0.1', port=8765):
+    '''
+    Accept clients on host:port and tick their games until cancelled
+    '''
+    server = await asyncio.start_server(lambda reader, writer: handle_client(manager, reader, writer), host, port)
+    async with server:
+        await asyncio.gather(server.serve_forever(), manager.run())
+
+def _peak_memory():
+    '''
+    Return the most memory the process has held so far in bytes, or None where the resource module is missing
+    '''
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def measure(session_count, ticks, settings=None):
+    '''
+    Tick session_count sessions ticks times with no waiting in between, each played by a bot that holds fire and
+    sweeps from side to side through its input queue, and publish a delta for each after every tick.
+    Returns the manager, the average seconds spent publishing one session's delta, and about how many bytes
+    of memory each session takes (None if that can't be measured here)
+    '''
+    manager = SessionManager(settings)
+    # a first session pays for what every game shares, e.g. the display and fonts, leave it out of the measurement
+    manager.close(manager.open())
+    memory_before = _peak_memory()
+    sessions = [manager.open() for _ in range(session_count)]
+    right, left, space = (pygame.key.key_code(name) for name in ('right', 'left', 'space'))
+    publish_time = 0.0
+    for tick in range(ticks):
+        for session in sessions:
+            game = session.game
+            if not game.game_active and not session.inputs.qsize():
+                # back to the menu after a game over, start another one holding fire
+                session.inputs.put_nowait(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1,
+                    pos=game.play_button.rect.center))
+                session.inputs.put_nowait(pygame.event.Event(pygame.KEYDOWN, key=space))
+            elif tick % 60 == 0:
+                # turn around once a second
+                going, turning = (right, left) if tick % 120 else (left, right)
+                session.inputs.put_nowait(pygame.event.Event(pygame.KEYUP, key=going))
+                session.inputs.put_nowait(pygame.event.Event(pygame.KEYDOWN, key=turning))
+        manager.tick()
+        start = perf_counter()
+        for session in sessions:
+            session.delta()
+        publish_time += perf_counter() - start
+    memory_after = _peak_memory()
+    for session in sessions:
+        manager.close(session)
+    memory = None if memory_before is None else (memory_after - memory_before) / session_count
+    return manager, publish_time / (session_count * ticks), memory
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Host many Alien Invasion games in one process")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--bench', type=int, metavar='SESSIONS',
+        help="instead of serving, measure what ticking this many bot-played sessions costs and exit")
+    parser.add_argument('--ticks', type=int, default=1000, help="ticks to measure for --bench")
+    args = parser.parse_args()
+
+    if args.bench:
+        manager, publish_cost, memory = measure(args.bench, args.ticks)
+        tick_cost = manager.cost_per_session()
+        per_session = tick_cost + publish_cost
+        print(f"{args.bench} sessions, {args.ticks} ticks: {tick_cost * 1e6:.1f}us ticking and "
+              f"{publish_cost * 1e6:.1f}us publishing per session per tick")
+        print(f"about {int(1 / (per_session * manager.tick_rate))} sessions per core at {manager.tick_rate} ticks per second")
+        if memory is not None:
+            print(f"about {memory / 2 ** 20:.2f}MB of memory per session")
+    else:
+        print(f"serving on {args.host}:{args.port}, one JSON object per line")
+        with contextlib.suppress(KeyboardInterrupt):
+            asyncio.run(serve(SessionManager(), args.host, args.port))
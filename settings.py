@@ -11,22 +11,45 @@ class Settings:
         self.screen_height = 650
         self.bg_color = (230, 230, 230)
 
-        # Ship settings
-        self.ship_speed = 1.5
+        # Frame timing: frames drawn per second (0 for uncapped), and physics steps per second.
+        # With fixed_step off, physics takes one step per frame of however long the frame took
+        self.target_fps = 60
+        self.physics_hz = 60
+        self.fixed_step = True
+        # longest the menu sleeps waiting for input before it goes round the loop again, in seconds
+        self.idle_timeout = 1.0
+
+        # Ship settings, speeds are in pixels per second
+        self.ship_speed = 90.0
         self.ship_limit = 3
+        # seconds the game waits after the ship is hit, and before the Play button comes back after the last ship
+        self.respawn_time = 0.5
+        self.game_over_time = 1.0
 
         # Laser settings
-        self.laser_speed = 2.5
+        self.laser_speed = 150.0
         self.laser_width = 3
         self.laser_height = 15
         self.laser_color = (60, 60, 60)
         self.laser_max_num = 10
+        # shots per second while the fire key is held down, 0 to only fire once per key press
+        self.auto_fire_rate = 3.0
+
+        # Controls: pygame key name -> action, one of move_left, move_right, fire and quit
+        self.keymap = {
+            'left': 'move_left',
+            'right': 'move_right',
+            'space': 'fire',
+            'q': 'quit',
+        }
 
         # Alien settings
-        self.alien_speed = 1.0
+        self.alien_speed = 60.0
         self.fleet_drop_speed = 200
         # fleet direction of 1 represents right, -1 is left
         self.fleet_direction = 1
+        # how the fleet is laid out, one of the names in formations.FORMATIONS
+        self.fleet_formation = 'grid'
 
         # How quickly the game speeds up
         self.speed_up_scale = 1.1
@@ -34,15 +57,27 @@ class Settings:
         # How quickly the alien point values increase
         self.score_scale = 1.5
 
+        # Sprite atlas built by atlas.py, images it doesn't have are loaded from their own files
+        self.atlas_path = 'images/sprites.atlas'
+
+        # File the high score is kept in between launches
+        self.high_score_path = 'high_score.log'
+
+        # Profiling settings: time every frame, show FPS on screen, and where to write the timings on exit
+        self.profile = False
+        self.profile_overlay = True
+        self.profile_dump_path = None
+
         self.initialize_dynamic_settings()
 
     def initialize_dynamic_settings(self):
         '''
         Initialize settings that will change throughout the game
         '''
-        self.ship_speed = 1.5
-        self.laser_speed = 2.5
-        self.alien_speed = 1.0
+        # pixels per second
+        self.ship_speed = 90.0
+        self.laser_speed = 150.0
+        self.alien_speed = 60.0
 
         #fleet direct of 1 is right, -1 is left
         self.fleet_direction = 1
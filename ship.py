@@ -1,10 +1,10 @@
-import pygame
 from pygame.sprite import Sprite
-from settings import Settings
 
-settings = Settings()
-DEFAULT_IMAGE_SIZE = (settings.screen_width * .12, settings.screen_height * .2)
-DEFAULT_LIVES_IMAGE_SIZE = (settings.screen_width * .12, settings.screen_height * .2)
+def image_size(settings):
+    '''
+    The size the ship and the lives icons are drawn at, a fixed share of the screen
+    '''
+    return settings.screen_width * .12, settings.screen_height * .2
 
 
 class Ship(Sprite):
@@ -17,38 +17,40 @@ class Ship(Sprite):
         '''
         super().__init__()
         # pygame lets you treat all game elements as rectangles, or 'rects', for efficiency
-        self.screen = ai_game.screen
-        self.screen_rect = ai_game.screen.get_rect()
+        self.renderer = ai_game.renderer
+        self.screen_rect = ai_game.screen_rect
         self.settings = ai_game.settings
 
-        # Load the ship image 
-        self.image = pygame.image.load('images/space-fighter-clipart-md.png')
- 
-        # Scale the image to appropriate size in play area
-        self.scaled_image = pygame.transform.scale(self.image, DEFAULT_IMAGE_SIZE)
+        # Load the ship image from the shared asset cache, scaled to appropriate size in play area
+        self.scaled_image = ai_game.assets.load('images/space-fighter-clipart-md.png', image_size(self.settings))
+        self.image = self.scaled_image
+        # which pixels of the ship are solid, so aliens only hit the fighter itself and not its empty corners
+        self.mask = ai_game.assets.mask('images/space-fighter-clipart-md.png', image_size(self.settings))
         
-        # Load ship position on screen
-        self.rect = self.image.get_rect()
+        # Load ship position on screen, the same size as the ship is drawn
+        self.rect = self.scaled_image.get_rect()
 
         # start each new ship at the bottom center of the screen
         self.rect.midbottom = self.screen_rect.midbottom
 
-        # store a float for the ship's exact horizontal position
+        # store a float for the ship's exact horizontal position, and where it was before the last update
         self.x = float(self.rect.x)
+        self.prev_x = self.x
 
         # movement flag: start with a ship that's not moving
         self.moving_right = False
         self.moving_left = False
 
-    def update(self):
+    def update(self, dt):
         '''
-        Update ship's position based on the movement flag
+        Update ship's position based on the movement flag, for dt seconds of movement
         '''
+        self.prev_x = self.x
         # update the ship's x value, not the rect. prevent from going off screen
         if self.moving_right and self.rect.right <self.screen_rect.right: 
-            self.x += self.settings.ship_speed
+            self.x += self.settings.ship_speed * dt
         if self.moving_left and self.rect.left > 0: 
-            self.x -= self.settings.ship_speed
+            self.x -= self.settings.ship_speed * dt
 
         # update rect object from self.x
         self.rect.x = self.x
@@ -59,13 +61,15 @@ class Ship(Sprite):
         '''
         self.rect.midbottom = self.screen_rect.midbottom
         self.x = float(self.rect.x)
+        self.prev_x = self.x
 
 
-    def blitme(self):
+    def blitme(self, alpha=1.0):
         '''
-        Draw the ship at its current location
+        Draw the ship at its current location, or alpha of the way there from where it was before the last update
         '''
-        self.screen.blit(self.scaled_image, self.rect)
+        x = self.prev_x + (self.x - self.prev_x) * alpha
+        self.renderer.queue(self.scaled_image, self.scaled_image.get_rect(topleft=(x, self.rect.y)))
 
 class ShipLivesGreen(Sprite):
     '''
@@ -77,21 +81,20 @@ class ShipLivesGreen(Sprite):
         '''
         super().__init__()
         # pygame lets you treat all game elements as rectangles, or 'rects', for efficiency
-        self.screen = ai_game.screen
-        self.screen_rect = ai_game.screen.get_rect()
+        self.renderer = ai_game.renderer
+        self.screen_rect = ai_game.screen_rect
         self.settings = ai_game.settings
 
-        # Load the ship lives green image 
-        self.image = pygame.image.load('images/green-circle.png')
- 
-        # Scale the image to appropriate size in play area
-        self.scaled_image = pygame.transform.scale(self.image, DEFAULT_LIVES_IMAGE_SIZE)
+        # Load the ship lives green image from the shared asset cache, scaled to appropriate size in play area.
+        # Only the scaled icon is ever drawn, so the full size image isn't loaded
+        self.scaled_image = ai_game.assets.load('images/green-circle.png', image_size(self.settings))
+        self.image = self.scaled_image
         
         # Load ship lives images position on screen
-        self.rect = self.image.get_rect()
+        self.rect = self.scaled_image.get_rect()
 
     def blitme(self):
-        self.screen.blit(self.scaled_image, self.rect)
+        self.renderer.queue(self.scaled_image, self.scaled_image.get_rect(topleft=self.rect.topleft))
         
 
 class ShipLivesRed(Sprite):
@@ -104,18 +107,17 @@ class ShipLivesRed(Sprite):
         '''
         super().__init__()
         # pygame lets you treat all game elements as rectangles, or 'rects', for efficiency
-        self.screen = ai_game.screen
-        self.screen_rect = ai_game.screen.get_rect()
+        self.renderer = ai_game.renderer
+        self.screen_rect = ai_game.screen_rect
         self.settings = ai_game.settings
 
-        # Load the ship lives red image 
-        self.image = pygame.image.load('images/red-x.png')
- 
-        # Scale the image to appropriate size in play area
-        self.scaled_image = pygame.transform.scale(self.image, DEFAULT_LIVES_IMAGE_SIZE)
+        # Load the ship lives red image from the shared asset cache, scaled to appropriate size in play area.
+        # Only the scaled icon is ever drawn, so the full size image isn't loaded
+        self.scaled_image = ai_game.assets.load('images/red-x.png', image_size(self.settings))
+        self.image = self.scaled_image
         
         # Load ship lives images position on screen
         self.rect = self.scaled_image.get_rect()                 
 
     def blitme(self):
-        self.screen.blit(self.scaled_image, self.rect)
\ No newline at end of file
+        self.renderer.queue(self.scaled_image, self.scaled_image.get_rect(topleft=self.rect.topleft))
\ No newline at end of file
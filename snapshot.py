@@ -0,0 +1,120 @@
+'''
+Snapshots of a game in progress. A snapshot is a bytes object: a fixed struct-packed header with every
+scalar the game's progress depends on, followed by the raw contents of the laser and fleet arrays.
+Restoring it into a game made with the same settings puts that game exactly where the snapshot was taken,
+so a search can branch any number of rollouts from one state
+'''
+import struct
+
+import numpy as np
+
+from game_state import MENU, PLAYING, RESPAWNING, GAME_OVER
+
+MAGIC = b'AISS'
+VERSION = 1
+
+# magic and version, game clock and state, physics timer, dynamic settings, stats, ship, controls, and how
+# many lasers and aliens follow
+HEADER = struct.Struct('<4sH QdBBd d dddqb qqii ddBB dB II')
+
+# the states and held actions are stored as small numbers, by their place in these
+STATES = (None, MENU, PLAYING, RESPAWNING, GAME_OVER)
+HELD_ACTIONS = ('move_left', 'move_right', 'fire')
+
+# dtypes of the arrays after the header, lasers then aliens
+LASER_ARRAYS = (('x', np.int64), ('y', np.float64), ('prev_y', np.float64))
+FLEET_ARRAYS = (('x', np.float64), ('y', np.float64), ('prev_x', np.float64), ('prev_y', np.float64),
+    ('alive', np.bool_))
+
+def save_snapshot(ai_game):
+    '''
+    Return a snapshot of ai_game
+    '''
+    state = ai_game.state
+    settings = ai_game.settings
+    stats = ai_game.stats
+    ship = ai_game.ship
+    controls = ai_game.controls
+    lasers = ai_game.lasers
+    fleet = ai_game.aliens
+
+    held = sum(1 << bit for bit, action in enumerate(HELD_ACTIONS) if action in controls.held)
+    header = HEADER.pack(MAGIC, VERSION,
+        ai_game.frame, ai_game.sim_time, STATES.index(state.current), STATES.index(state.next),
+        # NaN for a state with no time limit
+        float('nan') if state.time_left is None else state.time_left,
+        ai_game.timer.accumulator,
+        settings.ship_speed, settings.laser_speed, settings.alien_speed, settings.alien_points,
+        settings.fleet_direction,
+        stats.score, stats.high_score, stats.level, stats.ships_left,
+        ship.x, ship.prev_x, ship.moving_left, ship.moving_right,
+        controls.fire_cooldown, held,
+        len(lasers), len(fleet.x))
+
+    count = len(lasers)
+    arrays = [np.ascontiguousarray(getattr(lasers, name)[:count], dtype).tobytes() for name, dtype in LASER_ARRAYS]
+    arrays += [np.ascontiguousarray(getattr(fleet, name), dtype).tobytes() for name, dtype in FLEET_ARRAYS]
+    return b''.join([header] + arrays)
+
+def load_snapshot(ai_game, snapshot):
+    '''
+    Put ai_game back into the state saved in snapshot
+    '''
+    (magic, version, frame, sim_time, current, next_state, time_left, accumulator,
+        ship_speed, laser_speed, alien_speed, alien_points, fleet_direction,
+        score, high_score, level, ships_left,
+        ship_x, ship_prev_x, moving_left, moving_right,
+        fire_cooldown, held, laser_count, alien_count) = HEADER.unpack_from(snapshot)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} game snapshot")
+
+    ai_game.frame = frame
+    ai_game.sim_time = sim_time
+    ai_game.state.change(STATES[current], None if time_left != time_left else time_left, STATES[next_state])
+    ai_game.timer.accumulator = accumulator
+
+    settings = ai_game.settings
+    settings.ship_speed = ship_speed
+    settings.laser_speed = laser_speed
+    settings.alien_speed = alien_speed
+    settings.alien_points = alien_points
+    settings.fleet_direction = fleet_direction
+
+    # the scoreboard hears about these like any other change to the stats
+    stats = ai_game.stats
+    stats.score = score
+    stats.high_score = high_score
+    stats.level = level
+    stats.ships_left = ships_left
+
+    ship = ai_game.ship
+    ship.x = ship_x
+    ship.prev_x = ship_prev_x
+    ship.rect.x = ship_x
+    ship.moving_left = bool(moving_left)
+    ship.moving_right = bool(moving_right)
+
+    controls = ai_game.controls
+    controls.fire_cooldown = fire_cooldown
+    controls.held = {action for bit, action in enumerate(HELD_ACTIONS) if held & (1 << bit)}
+
+    offset = HEADER.size
+    laser_arrays = {}
+    for name, dtype in LASER_ARRAYS:
+        laser_arrays[name] = np.frombuffer(snapshot, dtype, laser_count, offset)
+        offset += laser_arrays[name].nbytes
+    fleet_arrays = {}
+    for name, dtype in FLEET_ARRAYS:
+        fleet_arrays[name] = np.frombuffer(snapshot, dtype, alien_count, offset)
+        offset += fleet_arrays[name].nbytes
+
+    ai_game.lasers.build(np.column_stack((laser_arrays['x'], laser_arrays['y'])))
+    ai_game.lasers.prev_y[:laser_count] = laser_arrays['prev_y']
+
+    # put every alien back in place, then take out the ones that were already shot down
+    fleet = ai_game.aliens
+    fleet.reset(np.column_stack((fleet_arrays['x'], fleet_arrays['y'])))
+    for index in np.flatnonzero(~fleet_arrays['alive']).tolist():
+        fleet.members[index].kill()
+    fleet.prev_x[:] = fleet_arrays['prev_x']
+    fleet.prev_y[:] = fleet_arrays['prev_y']
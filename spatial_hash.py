@@ -0,0 +1,80 @@
+from collections import defaultdict
+
+class SpatialHash:
+    '''
+    A uniform grid broadphase. Items are stored in every cell their bounds touch, so a query only
+    has to look at the items in the few cells around the query rect instead of at every item
+    '''
+    def __init__(self, cell_size):
+        '''
+        Initialize an empty grid of square cells of cell_size pixels
+        '''
+        self.cell_size = cell_size
+        # (cell x, cell y) -> items in that cell
+        self.cells = defaultdict(set)
+        # item -> (first cell x, first cell y, last cell x, last cell y) it is stored under
+        self.bounds = {}
+
+    def cell_bounds(self, left, top, width, height):
+        '''
+        Return the range of cells covered by a rect, as (first x, first y, last x, last y)
+        '''
+        size = self.cell_size
+        return (left // size, top // size, (left + width - 1) // size, (top + height - 1) // size)
+
+    def place(self, item, bounds):
+        '''
+        Store item under the cells in bounds. Does nothing if the item hasn't changed cells,
+        so items can be re-placed every time they move and only cell changes cost anything
+        '''
+        old_bounds = self.bounds.get(item)
+        if old_bounds == bounds:
+            return
+        if old_bounds is not None:
+            self._discard(item, old_bounds)
+        self.bounds[item] = bounds
+        first_x, first_y, last_x, last_y = bounds
+        for cell_x in range(first_x, last_x + 1):
+            for cell_y in range(first_y, last_y + 1):
+                self.cells[(cell_x, cell_y)].add(item)
+
+    def remove(self, item):
+        '''
+        Take item out of the grid
+        '''
+        bounds = self.bounds.pop(item, None)
+        if bounds is not None:
+            self._discard(item, bounds)
+
+    def _discard(self, item, bounds):
+        first_x, first_y, last_x, last_y = bounds
+        for cell_x in range(first_x, last_x + 1):
+            for cell_y in range(first_y, last_y + 1):
+                cell = self.cells[(cell_x, cell_y)]
+                cell.discard(item)
+                if not cell:
+                    del self.cells[(cell_x, cell_y)]
+
+    def query(self, rect):
+        '''
+        Return the set of items stored in any cell the rect touches. These are only candidates,
+        the caller still has to do the exact overlap test
+        '''
+        found = set()
+        if rect.width <= 0 or rect.height <= 0:
+            return found
+        first_x, first_y, last_x, last_y = self.cell_bounds(rect.x, rect.y, rect.width, rect.height)
+        cells = self.cells
+        for cell_x in range(first_x, last_x + 1):
+            for cell_y in range(first_y, last_y + 1):
+                cell = cells.get((cell_x, cell_y))
+                if cell:
+                    found |= cell
+        return found
+
+    def clear(self):
+        '''
+        Remove every item from the grid
+        '''
+        self.cells.clear()
+        self.bounds.clear()
@@ -0,0 +1,54 @@
+import pygame
+import pygame.font
+
+class FontRegistry:
+    '''
+    A class to share fonts, so each (name, size) is only looked up and loaded once
+    '''
+    def __init__(self):
+        '''
+        Initialize the font cache
+        '''
+        self.fonts = {}
+
+    def get(self, name=None, size=48):
+        '''
+        Return the system font name at size, None being pygame's default font
+        '''
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            if name is None:
+                # pygame's own font ships with it, so there's no need to scan the system fonts for it
+                font = pygame.font.Font(None, size)
+            else:
+                font = pygame.font.SysFont(name, size)
+            self.fonts[key] = font
+        return font
+
+class GlyphAtlas:
+    '''
+    A class that pre-renders a fixed set of characters once, and builds text out of them by blitting
+    the cached glyphs instead of asking the font to render the whole string again
+    '''
+    def __init__(self, font, text_color, bg_color, characters='0123456789,'):
+        '''
+        Render every character in characters
+        '''
+        self.bg_color = bg_color
+        self.glyphs = {char: font.render(char, True, text_color, bg_color) for char in characters}
+        self.height = max(glyph.get_height() for glyph in self.glyphs.values())
+
+    def render(self, text):
+        '''
+        Return a surface with text composed from the cached glyphs
+        '''
+        glyphs = [self.glyphs[char] for char in text]
+        image = pygame.Surface((sum(glyph.get_width() for glyph in glyphs), self.height))
+        image.fill(self.bg_color)
+
+        x = 0
+        for glyph in glyphs:
+            image.blit(glyph, (x, 0))
+            x += glyph.get_width()
+        return image
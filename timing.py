@@ -0,0 +1,30 @@
+class FixedStepTimer:
+    '''
+    A class to turn real frame times into whole fixed-size physics steps. Leftover time is carried over
+    to the next frame, and how far we are into the next step is used to interpolate what gets drawn
+    '''
+    def __init__(self, step, max_frame_time=0.25):
+        '''
+        Initialize the timer for steps of step seconds
+        '''
+        self.step = step
+        # a frame that took longer than this (e.g. the window was dragged) is not fully caught up,
+        # otherwise we'd spend the next frame simulating and fall further behind
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+
+    def advance(self, elapsed):
+        '''
+        Add elapsed real seconds and return how many physics steps to run now
+        '''
+        self.accumulator += min(elapsed, self.max_frame_time)
+        steps = int(self.accumulator // self.step)
+        self.accumulator -= steps * self.step
+        return steps
+
+    @property
+    def alpha(self):
+        '''
+        How far between the last step and the next one we are, from 0 to 1
+        '''
+        return self.accumulator / self.step